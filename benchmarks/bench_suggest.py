@@ -0,0 +1,56 @@
+"""Benchmark autocomplete suggestion queries against a synthetic catalog.
+
+Usage: python benchmarks/bench_suggest.py [--size 100000] [--budget-ms 10]
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic import generate_catalog  # noqa: E402
+from catalog import Catalog  # noqa: E402
+
+QUERIES = ('re', 'rev', 'reve', 'revnue', 'rev net', 'net revenue', 'cust ord 5',
+           'sales c', 'date year', 'closed (month', 'zzz')
+
+
+def time_queries(search, queries, repeat):
+    """Return {query: [milliseconds, ...]} for repeat runs of each query"""
+    timings = {}
+    for query in queries:
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            search(query)
+            runs.append((time.perf_counter() - start) * 1000)
+        timings[query] = runs
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=100_000)
+    parser.add_argument('--k', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--budget-ms', type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    catalog = Catalog(generate_catalog(args.size))
+    print(f"Indexed {len(catalog)} items in {time.perf_counter() - start:.2f} s")
+
+    over_budget = False
+    print(f"\n{'query':<16} {'p50 ms':>8} {'max ms':>8}")
+    for query, runs in time_queries(lambda q: catalog.suggest(q, args.k), QUERIES, args.repeat).items():
+        p50, worst = statistics.median(runs), max(runs)
+        flag = '' if p50 <= args.budget_ms else '  over budget'
+        over_budget |= bool(flag)
+        print(f"{query!r:<16} {p50:8.2f} {worst:8.2f}{flag}")
+    return 1 if over_budget else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,213 @@
+"""Benchmark the app's core operations on synthetic catalogs and report JSON.
+
+Usage: python benchmarks/bench_suite.py [--sizes 1000,10000,100000,1000000]
+                                        [--out results.json] [--compare baseline.json]
+
+Runs headless against the core modules the UI is built on: catalog load and
+save (config.json, SQLite and the in-memory indexes), fuzzy suggestions,
+Copy Code expansion, name linking and metadata import.
+
+With --compare the exit status is 1 if anything regressed, and 2 if some
+operation has too few runs on either side to be compared.
+"""
+import argparse
+import io
+import itertools
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.bench_suggest import QUERIES  # noqa: E402
+from benchmarks.synthetic import generate_catalog, generate_metadata_dump, generate_script  # noqa: E402
+from catalog import CATEGORIES, Catalog  # noqa: E402
+from catalog_store import CatalogStore  # noqa: E402
+from importer import read_batches  # noqa: E402
+from persistence import read_state, write_atomic  # noqa: E402
+from references import NameMatcher, Reference, expand_spans, line_offsets, locate_references  # noqa: E402
+
+PID = 'benchpid'
+SCRIPT_LINES = 10_000  # Editor size for the expansion and linking benchmarks
+MIN_COMPARE_RUNS = 5  # Fewer samples than this are too noisy to call a regression
+
+
+def measure(func, repeat):
+    """Return {p50_ms, p99_ms, runs} over repeat calls of func"""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        runs.append((time.perf_counter() - start) * 1000)
+    runs.sort()
+    return {
+        'p50_ms': round(statistics.median(runs), 3),
+        'p99_ms': round(runs[min(len(runs) - 1, int(len(runs) * 0.99))], 3),
+        'runs': repeat,
+    }
+
+
+def measure_queries(search, repeat):
+    """Return measure() over every benchmark query, pooled"""
+    runs = []
+    for query in QUERIES:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            search(query)
+            runs.append((time.perf_counter() - start) * 1000)
+    runs.sort()
+    return {
+        'p50_ms': round(statistics.median(runs), 3),
+        'p99_ms': round(runs[min(len(runs) - 1, int(len(runs) * 0.99))], 3),
+        'runs': len(runs),
+    }
+
+
+def expand_script(text, marks, references):
+    """AutocompleteText.get_expanded_text, with the mark dump it gets from Tk given"""
+    spans, _ = locate_references(text, marks, references)
+    return expand_spans(text, [(start, end, ref.text) for start, end, ref in spans])
+
+
+def bench_size(size, workdir, repeat, heavy=None):
+    """Return {operation: stats} for a catalog of size items"""
+    if heavy is None:  # Runs of each whole-catalog operation
+        heavy = max(MIN_COMPARE_RUNS, repeat // 2)
+    state = generate_catalog(size)
+    results = {}
+
+    # Save and load: config.json snapshot, SQLite store, in-memory indexes
+    config_file = workdir / f'config-{size}.json'
+    results['save_json'] = measure(lambda: write_atomic(config_file, json.dumps(state, indent=2)), heavy)
+    results['load_json'] = measure(lambda: read_state(config_file, workdir / 'missing.journal'), heavy)
+
+    store = CatalogStore(workdir / f'catalog-{size}.db')
+    entries = [(category, entry['id'], entry['name']) for category in CATEGORIES for entry in state[category]]
+    # A new PID per run, so every run inserts rows instead of upserting existing ones
+    save_runs = itertools.count()
+    results['save_sqlite'] = measure(lambda: store.put_many(f'{PID}-{next(save_runs)}', entries), heavy)
+    results['load_sqlite'] = measure(lambda: store.load_state(f'{PID}-0'), heavy)
+
+    results['index_catalog'] = measure(lambda: Catalog(state, pid=PID), heavy)
+    catalog = Catalog(state, pid=PID)
+
+    # Suggestions, as typed into the editor
+    results['suggest_fuzzy'] = measure_queries(lambda query: catalog.suggest(query, 50), repeat)
+
+    # Copy Code expansion and name linking over a fixed-size script
+    text, spans = generate_script(state, SCRIPT_LINES)
+    offsets = line_offsets(text)
+    marks = []
+    references = {}
+    line = 0
+    for number, (start, end, category, obj_id) in enumerate(spans):
+        # Spans are in text order, so walk the line table alongside
+        while line + 1 < len(offsets) and offsets[line + 1] <= start:
+            line += 1
+        mark = f'ref{number}'
+        marks.append((mark, f'{line + 1}.{start - offsets[line]}'))
+        references[mark] = Reference(text[start:end], PID, obj_id, category)
+    results['expand_references'] = measure(lambda: expand_script(text, marks, references), heavy)
+
+    names = [(item.name, item) for item in catalog]
+    results['build_name_matcher'] = measure(lambda: NameMatcher(names), heavy)
+    matcher = NameMatcher(names)
+    results['link_names'] = measure(lambda: sum(1 for _ in matcher.finditer(text)), heavy)
+
+    # Streaming import of a metadata dump into an empty catalog
+    dump = generate_metadata_dump(state, PID)
+
+    def import_dump():
+        target = Catalog(pid=PID)
+        for batch in read_batches(io.BytesIO(dump)):
+            target.add_many(batch)
+    results['import_metadata'] = measure(import_dump, heavy)
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """Return (regressions, skipped): lines for operations whose p50 grew by more than
+    tolerance and past the baseline's p99, and for those with too few runs on
+    either side to compare
+    """
+    regressions = []
+    skipped = []
+    for size, operations in results['sizes'].items():
+        for name, stats in operations.items():
+            before = baseline.get('sizes', {}).get(size, {}).get(name)
+            if not before or before['p50_ms'] <= 0:
+                continue
+            if min(stats['runs'], before['runs']) < MIN_COMPARE_RUNS:
+                skipped.append(f"{name} @ {size}: {min(stats['runs'], before['runs'])} runs")
+            elif stats['p50_ms'] > max(before['p50_ms'] * (1 + tolerance), before['p99_ms']):
+                # Slower than tolerated and than the baseline's own slowest runs
+                regressions.append(f"{name} @ {size}: {before['p50_ms']:.2f} -> {stats['p50_ms']:.2f} ms")
+    return regressions, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1000,10000,100000,1000000',
+                        help="comma-separated catalog sizes")
+    parser.add_argument('--repeat', type=int, default=10, help="runs per suggestion query")
+    parser.add_argument('--heavy-repeat', type=int,
+                        help=f"runs per whole-catalog operation (default: half of --repeat, "
+                             f"at least {MIN_COMPARE_RUNS})")
+    parser.add_argument('--out', help="write the JSON report here instead of stdout")
+    parser.add_argument('--compare', help="baseline JSON report to check for regressions")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed p50 slowdown against the baseline (0.25 = 25%%), "
+                             "beyond its p99")
+    args = parser.parse_args(argv)
+    if args.compare and args.heavy_repeat is not None and args.heavy_repeat < MIN_COMPARE_RUNS:
+        parser.error(f"--compare needs --heavy-repeat of at least {MIN_COMPARE_RUNS}")
+
+    results = {
+        'meta': {
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.time(),
+            'script_lines': SCRIPT_LINES,
+        },
+        'sizes': {},
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in (int(size) for size in args.sizes.split(',')):
+            print(f"Benchmarking {size} items...", file=sys.stderr)
+            results['sizes'][str(size)] = bench_size(size, Path(workdir), args.repeat, args.heavy_repeat)
+
+    report = json.dumps(results, indent=2)
+    if args.out:
+        Path(args.out).write_text(report)
+    else:
+        print(report)
+
+    if args.compare:
+        regressions, skipped = compare(results, json.loads(Path(args.compare).read_text()), args.tolerance)
+        for line in skipped:
+            print(f"Not compared, fewer than {MIN_COMPARE_RUNS} runs: {line}", file=sys.stderr)
+        for line in regressions:
+            print(f"Regression: {line}", file=sys.stderr)
+        if regressions:
+            return 1
+        return 2 if skipped else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""Synthetic GoodData-like catalogs for headless benchmarks"""
+import json
+import random
+
+from catalog import CATEGORIES
+
+WORDS = (
+    'revenue net gross margin profit cost count customer order region country city '
+    'product category sales amount average total quantity discount invoice account '
+    'opportunity pipeline forecast target quota employee department manager stage '
+    'status type segment channel campaign lead source won lost closed created'
+).split()
+DATE_PARTS = ('Year', 'Quarter', 'Month', 'Week', 'Day', 'Day of Week', 'Month/Year')
+DATE_DIMENSIONS = ('Date', 'Created', 'Closed', 'Snapshot', 'Invoice', 'Shipped')
+
+
+def generate_names(count, seed=0):
+    """Return count metric/attribute-like names built from a small business vocabulary"""
+    rng = random.Random(seed)
+    names = []
+    for index in range(count):
+        words = [rng.choice(WORDS).capitalize() for _ in range(rng.randint(1, 4))]
+        if index % 3 == 0:
+            words.append(str(index % 997))
+        names.append(' '.join(words))
+    return names
+
+
+def generate_catalog(size, seed=0):
+    """Return a config.json-style state with size items split across the categories"""
+    rng = random.Random(seed)
+    names = generate_names(size, seed)
+    state = {category: [] for category in CATEGORIES}
+    for obj_id, name in enumerate(names, start=1000):
+        roll = rng.random()
+        if roll < 0.1:
+            dimension = rng.choice(DATE_DIMENSIONS)
+            name = f"{dimension} ({rng.choice(DATE_PARTS)}) {obj_id % 97}"
+            state['dates'].append({'name': name, 'id': str(obj_id)})
+        elif roll < 0.55:
+            state['metrics'].append({'name': name, 'id': str(obj_id)})
+        else:
+            state['attributes'].append({'name': name, 'id': str(obj_id)})
+    return state
+
+
+def generate_metadata_dump(state, pid='benchpid'):
+    """Return a query/metrics-style JSON export of state, as bytes"""
+    kinds = {'metrics': ('metric', 'metric'), 'attributes': ('attribute', 'attr'),
+             'dates': ('attribute', 'date')}
+    entries = []
+    for category in CATEGORIES:
+        kind, prefix = kinds[category]
+        for entry in state[category]:
+            entries.append({
+                'link': f"/gdc/md/{pid}/obj/{entry['id']}",
+                'title': entry['name'],
+                'category': kind,
+                'identifier': f"{prefix}.{entry['id']}",
+            })
+    return json.dumps({'query': {'entries': entries, 'meta': {'summary': 'synthetic'}}}).encode()
+
+
+def generate_script(state, lines, seed=0, per_line=3):
+    """Return MAQL-like text naming per_line catalog items on each line, and the
+    (start, end, category, obj_id) offsets of those names
+    """
+    rng = random.Random(seed)
+    entries = [(category, entry) for category in CATEGORIES for entry in state[category]]
+    parts = []
+    spans = []
+    length = 0
+    for _ in range(lines):
+        for position in range(per_line):
+            glue = 'SELECT ' if position == 0 else ' + '
+            category, entry = rng.choice(entries)
+            parts.append(glue)
+            length += len(glue)
+            spans.append((length, length + len(entry['name']), category, entry['id']))
+            parts.append(entry['name'])
+            length += len(entry['name'])
+        parts.append(' WHERE x = 1\n')
+        length += len(parts[-1])
+    return ''.join(parts), spans
@@ -0,0 +1,221 @@
+from search import FuzzyIndex
+
+CATEGORIES = ('metrics', 'attributes', 'dates')
+
+
+class CatalogItem:
+    """A saved metric, attribute or date object"""
+    __slots__ = ('name', 'obj_id', 'category')
+
+    def __init__(self, name, obj_id, category):
+        self.name = name
+        self.obj_id = obj_id
+        self.category = category
+
+    def __repr__(self):
+        return f"CatalogItem({self.name!r}, {self.obj_id!r}, {self.category!r})"
+
+    def to_dict(self):
+        """Return the item in the config.json format"""
+        return {'name': self.name, 'id': self.obj_id}
+
+
+class Catalog:
+    """Headless source of truth for the saved objects, indexed by id, name and category.
+
+    Object ids are unique within a catalog: adding an id that already exists
+    updates the existing item. Listeners registered with subscribe() are called
+    as listener(event, item, previous) with event one of 'add', 'update',
+    'remove', 'batch' or 'reset'. 'batch' reports an add_many() or remove_many()
+    and 'reset' a wholesale replacement; item is None for both. For 'update', previous is a
+    detached copy of the item before the change; otherwise it is None.
+    """
+
+    def __init__(self, state=None, pid=None):
+        self.pid = pid  # The GoodData project these objects belong to
+        self._by_id = {}
+        self._by_name = {}  # name -> list of items sharing that name
+        self._by_category = {category: [] for category in CATEGORIES}
+        self.fuzzy_index = FuzzyIndex()
+        self._listeners = []
+        if state:
+            self.load(state)
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self):
+        for category in CATEGORIES:
+            yield from self._by_category[category]
+
+    def __contains__(self, obj_id):
+        return obj_id in self._by_id
+
+    # Listeners ------------------------------------------------------------
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        self._listeners.remove(listener)
+
+    def _notify(self, event, item, previous=None):
+        for listener in self._listeners:
+            listener(event, item, previous)
+
+    # Lookups --------------------------------------------------------------
+
+    def get(self, obj_id):
+        """Return the item with this id, or None"""
+        return self._by_id.get(obj_id)
+
+    def find_by_name(self, name):
+        """Return the first item with exactly this name, or None"""
+        items = self._by_name.get(name)
+        return items[0] if items else None
+
+    def items(self, category):
+        """Return the live, ordered list of items in a category"""
+        return self._by_category[category]
+
+    def suggest(self, query, k=20):
+        """Return the k best fuzzy matches for query, best first"""
+        by_id = self._by_id
+        return [by_id[obj_id] for obj_id in self.fuzzy_index.search(query, k)]
+
+    # Mutations ------------------------------------------------------------
+
+    def _index(self, item):
+        self._by_id[item.obj_id] = item
+        self._by_name.setdefault(item.name, []).append(item)
+
+    def _unindex(self, item):
+        del self._by_id[item.obj_id]
+        same_name = self._by_name[item.name]
+        same_name.remove(item)
+        if not same_name:
+            del self._by_name[item.name]
+
+    def add(self, name, obj_id, category):
+        """Add an item, or update the existing item with the same id"""
+        obj_id = str(obj_id)
+        existing = self._by_id.get(obj_id)
+        if existing is not None:
+            self.update(existing, name=name, category=category)
+            return existing
+
+        item = CatalogItem(name, obj_id, category)
+        self._index(item)
+        self._by_category[category].append(item)
+        self.fuzzy_index.add(name, obj_id)
+        self._notify('add', item)
+        return item
+
+    def update(self, item, name=None, obj_id=None, category=None):
+        """Change an item's name, id or category in place"""
+        name = item.name if name is None else name
+        obj_id = item.obj_id if obj_id is None else str(obj_id)
+        category = item.category if category is None else category
+        if (name, obj_id, category) == (item.name, item.obj_id, item.category):
+            return item
+
+        # An edit that takes over another item's id replaces that item
+        clash = self._by_id.get(obj_id)
+        if clash is not None and clash is not item:
+            self.remove(clash)
+
+        previous = CatalogItem(item.name, item.obj_id, item.category)
+        self._replace(item, name, obj_id, category)
+        self._notify('update', item, previous)
+        return item
+
+    def _replace(self, item, name, obj_id, category):
+        self._unindex(item)
+        self.fuzzy_index.remove(item.obj_id)
+        if category != item.category:
+            self._by_category[item.category].remove(item)
+            self._by_category[category].append(item)
+        item.name, item.obj_id, item.category = name, obj_id, category
+        self._index(item)
+        self.fuzzy_index.add(name, obj_id)
+
+    def add_many(self, entries):
+        """Add or update (category, obj_id, name) entries with a single 'batch' notification.
+
+        Meant for bulk imports: listeners are told once however many entries
+        there are. Persisting the entries is up to the caller.
+        """
+        for category, obj_id, name in entries:
+            obj_id = str(obj_id)
+            existing = self._by_id.get(obj_id)
+            if existing is not None:
+                if (existing.name, existing.category) != (name, category):
+                    self._replace(existing, name, obj_id, category)
+                continue
+            item = CatalogItem(name, obj_id, category)
+            self._index(item)
+            self._by_category[category].append(item)
+            self.fuzzy_index.add(name, obj_id)
+        self._notify('batch', None)
+
+    def remove(self, item):
+        """Remove an item from the catalog"""
+        self._unindex(item)
+        self._by_category[item.category].remove(item)
+        self.fuzzy_index.remove(item.obj_id)
+        self._notify('remove', item)
+
+    def remove_many(self, obj_ids):
+        """Remove the items with these ids with a single 'batch' notification.
+
+        The category lists are filtered in place once, instead of one list
+        scan per item. Unknown ids are ignored; persisting is up to the caller.
+        """
+        removed = set()
+        for obj_id in obj_ids:
+            item = self._by_id.get(str(obj_id))
+            if item is None:
+                continue
+            self._unindex(item)
+            self.fuzzy_index.remove(item.obj_id)
+            removed.add(item.obj_id)
+        if not removed:
+            return
+        for items in self._by_category.values():
+            items[:] = [item for item in items if item.obj_id not in removed]  # Keep the live lists
+        self._notify('batch', None)
+
+    # Serialization --------------------------------------------------------
+
+    def load(self, state):
+        """Replace the contents with the metrics/attributes/dates lists of a config dict"""
+        self._by_id = {}
+        self._by_name = {}
+        self._by_category = {category: [] for category in CATEGORIES}
+        for category in CATEGORIES:
+            items = self._by_category[category]
+            for entry in state.get(category, []):
+                obj_id = str(entry['id'])
+                if obj_id in self._by_id:
+                    continue  # Keep the first occurrence of a duplicated id
+                item = CatalogItem(entry['name'], obj_id, category)
+                self._index(item)
+                items.append(item)
+        self.fuzzy_index.rebuild((item.name, item.obj_id) for item in self._by_id.values())
+        self._notify('reset', None)
+
+    def adopt(self, other):
+        """Take over the contents of another catalog, e.g. one built off the Tk thread"""
+        self.pid = other.pid
+        self._by_id = other._by_id
+        self._by_name = other._by_name
+        self._by_category = other._by_category
+        self.fuzzy_index = other.fuzzy_index
+        self._notify('reset', None)
+
+    def to_state(self):
+        """Return the metrics/attributes/dates lists in the config.json format"""
+        return {
+            category: [item.to_dict() for item in self._by_category[category]]
+            for category in CATEGORIES
+        }
@@ -0,0 +1,114 @@
+import threading
+from collections import OrderedDict
+
+from catalog import Catalog
+
+ITEM_BYTES = 1024  # Measured cost of one indexed item (names around 20 characters)
+CACHE_BYTES = 256 * 1024 * 1024
+
+
+class CatalogCache:
+    """LRU cache of loaded per-PID catalogs, bounded by their estimated memory.
+
+    Catalogs are loaded from the CatalogStore with their search indexes built,
+    so switching back to a cached PID needs no SQLite read or re-indexing. The
+    cache is safe to use from worker threads; the most recently used catalog
+    is never evicted, so the one on screen stays cached however large it is.
+    """
+
+    def __init__(self, store, max_bytes=CACHE_BYTES):
+        self.store = store
+        self.max_bytes = max_bytes
+        self._catalogs = OrderedDict()  # pid -> Catalog, least recently used first
+        self._lock = threading.Lock()
+        self._prefetching = None
+
+    def __contains__(self, pid):
+        return pid in self._catalogs
+
+    def size(self):
+        """Estimated bytes held by the cached catalogs"""
+        with self._lock:
+            return sum(len(catalog) for catalog in self._catalogs.values()) * ITEM_BYTES
+
+    def get(self, pid):
+        """Return the cached catalog for pid and mark it most recently used, or None"""
+        with self._lock:
+            catalog = self._catalogs.get(pid)
+            if catalog is not None:
+                self._catalogs.move_to_end(pid)
+            return catalog
+
+    def load(self, pid):
+        """Return the catalog for pid, loading and indexing it on a miss (call off the Tk thread)"""
+        catalog = self.get(pid)
+        if catalog is None:
+            catalog = Catalog(self.store.load_state(pid), pid=pid)
+            self._put(pid, catalog, recent=True)
+        return catalog
+
+    def get_verified(self, pid):
+        """Like get(), but drop and miss a copy whose item count no longer matches SQLite's.
+
+        Catches adds and removals made by other processes that nobody reported.
+        """
+        catalog = self.get(pid)
+        if catalog is not None and len(catalog) != self.store.count(pid):
+            self.invalidate(pid)
+            return None
+        return catalog
+
+    def invalidate(self, pid):
+        """Drop a PID whose stored items changed behind the cache's back"""
+        with self._lock:
+            self._catalogs.pop(pid, None)
+
+    def invalidate_others(self, pid):
+        """Drop every PID but pid, e.g. when another process may have changed any of them"""
+        with self._lock:
+            for other in [other for other in self._catalogs if other != pid]:
+                del self._catalogs[other]
+
+    def _put(self, pid, catalog, recent):
+        with self._lock:
+            if not recent and pid in self._catalogs:
+                return  # Loaded for use meanwhile; that copy may already have edits
+            self._catalogs[pid] = catalog
+            self._catalogs.move_to_end(pid, last=recent)
+            total = sum(len(cached) for cached in self._catalogs.values()) * ITEM_BYTES
+            while total > self.max_bytes and len(self._catalogs) > 1:
+                _, evicted = self._catalogs.popitem(last=False)
+                total -= len(evicted) * ITEM_BYTES
+
+    def prefetch(self, pids):
+        """Load the given PIDs, most important first, on a background thread.
+
+        Prefetched catalogs are cached as least recently used, and PIDs that
+        wouldn't fit in the memory budget are skipped, so prefetching never
+        evicts a catalog that was actually used.
+        """
+        if self._prefetching is not None and self._prefetching.is_alive():
+            return
+        pids = [pid for pid in pids if pid and pid not in self._catalogs]
+        if not pids:
+            return
+
+        def work():
+            for pid in pids:
+                if pid in self._catalogs:
+                    continue
+                if self.size() + self.store.count(pid) * ITEM_BYTES > self.max_bytes:
+                    continue
+                catalog = Catalog(self.store.load_state(pid), pid=pid)
+                # Least important ends up first in line for eviction
+                self._put(pid, catalog, recent=False)
+
+        self._prefetching = threading.Thread(target=self._run_prefetch, args=(work,),
+                                             name='catalog-prefetch', daemon=True)
+        self._prefetching.start()
+
+    def _run_prefetch(self, work):
+        try:
+            work()
+        except Exception as e:
+            print(f"Error prefetching catalogs: {e}")
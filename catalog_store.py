@@ -0,0 +1,202 @@
+import json
+import sqlite3
+import threading
+
+from catalog import CATEGORIES
+from persistence import CONFIG_DIR
+
+CATALOG_DB = CONFIG_DIR / 'catalog.db'
+NAME_BATCH = 500  # Bound parameters per IN (...) query; old SQLite builds allow 999
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS items (
+    pid TEXT NOT NULL,
+    obj_id TEXT NOT NULL,
+    category TEXT NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (pid, obj_id)
+);
+CREATE INDEX IF NOT EXISTS items_pid_category ON items (pid, category);
+CREATE INDEX IF NOT EXISTS items_pid_name ON items (pid, name);
+CREATE TABLE IF NOT EXISTS sync_pages (
+    pid TEXT NOT NULL,
+    url TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    count INTEGER NOT NULL,  -- Objects on the page, before classification
+    ids TEXT NOT NULL,  -- JSON list of the item ids the page delivered
+    PRIMARY KEY (pid, url)
+);
+"""
+
+# Databases created before the name search was dropped still carry its FTS5
+# table and triggers, which would keep taxing every write
+DROP_FTS = """
+DROP TRIGGER IF EXISTS items_fts_insert;
+DROP TRIGGER IF EXISTS items_fts_delete;
+DROP TRIGGER IF EXISTS items_fts_update;
+DROP TABLE IF EXISTS items_fts;
+"""
+
+UPSERT = """
+INSERT INTO items (pid, obj_id, category, name) VALUES (?, ?, ?, ?)
+ON CONFLICT (pid, obj_id) DO UPDATE SET category = excluded.category, name = excluded.name
+"""
+
+
+class CatalogStore:
+    """SQLite store of catalog items for every PID, keyed by (pid, obj_id).
+
+    Items keep their insertion order (rowid) within a PID, which is the order
+    the panels show them in. Each thread gets its own connection, so the store
+    can be read from background loaders while the Tk thread writes edits.
+    """
+
+    def __init__(self, path=CATALOG_DB):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        with conn:
+            conn.executescript(SCHEMA)
+        try:
+            with conn:
+                conn.executescript(DROP_FTS)
+        except sqlite3.OperationalError:  # SQLite built without FTS5 can't drop the table either
+            pass
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    # Reads ----------------------------------------------------------------
+
+    def count(self, pid):
+        return self._conn().execute('SELECT COUNT(*) FROM items WHERE pid = ?', (pid,)).fetchone()[0]
+
+    def load_state(self, pid):
+        """Return one PID's items in the config.json metrics/attributes/dates format"""
+        state = {category: [] for category in CATEGORIES}
+        rows = self._conn().execute(
+            'SELECT category, obj_id, name FROM items WHERE pid = ? ORDER BY rowid', (pid,))
+        for category, obj_id, name in rows:
+            state[category].append({'name': name, 'id': obj_id})
+        return state
+
+    def get(self, pid, obj_id):
+        """Return (category, name) of an item, or None"""
+        return self._conn().execute(
+            'SELECT category, name FROM items WHERE pid = ? AND obj_id = ?',
+            (pid, str(obj_id))).fetchone()
+
+    def ids_by_name(self, pid, names):
+        """Return {(category, name): obj_id} for the items in one PID with any of the given names.
+
+        The first item wins when a name repeats in a category, as in the panels.
+        """
+        names = list(names)
+        ids = {}
+        for start in range(0, len(names), NAME_BATCH):
+            batch = names[start:start + NAME_BATCH]
+            rows = self._conn().execute(
+                f"SELECT category, name, obj_id FROM items WHERE pid = ? AND name IN "
+                f"({', '.join('?' * len(batch))}) ORDER BY rowid", (pid, *batch))
+            for category, name, obj_id in rows:
+                ids.setdefault((category, name), obj_id)
+        return ids
+
+    # Writes ---------------------------------------------------------------
+
+    def put(self, pid, category, obj_id, name):
+        with self._conn() as conn:
+            conn.execute(UPSERT, (pid, str(obj_id), category, name))
+
+    def put_many(self, pid, entries):
+        """Upsert (category, obj_id, name) tuples in one transaction"""
+        with self._conn() as conn:
+            conn.executemany(UPSERT, ((pid, str(obj_id), category, name)
+                                      for category, obj_id, name in entries))
+
+    def remove(self, pid, obj_id):
+        with self._conn() as conn:
+            conn.execute('DELETE FROM items WHERE pid = ? AND obj_id = ?', (pid, str(obj_id)))
+
+    def remove_many(self, pid, obj_ids):
+        """Delete items by id in one transaction"""
+        with self._conn() as conn:
+            conn.executemany('DELETE FROM items WHERE pid = ? AND obj_id = ?',
+                             ((pid, str(obj_id)) for obj_id in obj_ids))
+
+    def apply_change(self, pid, event, item, previous=None):
+        """Write a Catalog change event for the catalog of the given PID"""
+        if not pid:
+            return
+        if event == 'remove':
+            self.remove(pid, item.obj_id)
+        elif event in ('add', 'update'):
+            with self._conn() as conn:
+                if previous is not None and previous.obj_id != item.obj_id:
+                    # Re-key in place so the item keeps its position
+                    cursor = conn.execute(
+                        'UPDATE items SET obj_id = ?, category = ?, name = ? WHERE pid = ? AND obj_id = ?',
+                        (item.obj_id, item.category, item.name, pid, previous.obj_id))
+                    if cursor.rowcount:
+                        return
+                conn.execute(UPSERT, (pid, item.obj_id, item.category, item.name))
+
+    # API sync -------------------------------------------------------------
+
+    def sync_pages(self, pid):
+        """Return {url: (etag, last_modified, count, ids)} for the pages last synced for a PID"""
+        rows = self._conn().execute(
+            'SELECT url, etag, last_modified, count, ids FROM sync_pages WHERE pid = ?', (pid,))
+        return {url: (etag, last_modified, count, json.loads(ids))
+                for url, etag, last_modified, count, ids in rows}
+
+    def apply_sync(self, pid, entries, removed_ids, pages):
+        """Store one sync's results in a single transaction.
+
+        entries are (category, obj_id, name) tuples to upsert, removed_ids the
+        previously synced ids the API no longer returns, and pages the new
+        {url: (etag, last_modified, count, ids)}, replacing the old ones.
+        """
+        with self._conn() as conn:
+            conn.executemany(UPSERT, ((pid, str(obj_id), category, name)
+                                      for category, obj_id, name in entries))
+            conn.executemany('DELETE FROM items WHERE pid = ? AND obj_id = ?',
+                             ((pid, str(obj_id)) for obj_id in removed_ids))
+            conn.execute('DELETE FROM sync_pages WHERE pid = ?', (pid,))
+            conn.executemany(
+                'INSERT INTO sync_pages (pid, url, etag, last_modified, count, ids) VALUES (?, ?, ?, ?, ?, ?)',
+                ((pid, url, etag, last_modified, count, json.dumps(ids))
+                 for url, (etag, last_modified, count, ids) in pages.items()))
+
+    # Migration ------------------------------------------------------------
+
+    def migrate_from_json(self, app_state):
+        """One-time import of the flat config.json lists into the PID they were used with.
+
+        The old format shared one list across every PID; it is attributed to the
+        PID that was current when the app was last closed.
+        """
+        conn = self._conn()
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone():
+            return False
+        pid = app_state.get('current_pid') or next(iter(app_state.get('saved_pids', [])), '')
+        with conn:
+            conn.executemany(UPSERT, (
+                (pid, str(entry['id']), category, entry['name'])
+                for category in CATEGORIES
+                for entry in app_state.get(category, [])
+            ))
+            conn.execute("INSERT INTO meta (key, value) VALUES ('json_migrated', ?)", (pid,))
+        return True
@@ -0,0 +1,125 @@
+"""Replace catalog names in MAQL files with object references, without the UI.
+
+    python cli.py --pid PID templates/ > out.maql
+    python cli.py --pid PID --out build/ templates/ extra.maql
+    cat metric.maql | python cli.py --pid PID
+
+Names are matched exactly, longest first, on token boundaries; quoted strings
+and existing [...] references are left alone. Output is streamed line by line,
+and large file sets are spread across a process pool. Nothing here imports
+tkinter, so it runs in deploy scripts and on machines without a display.
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+from catalog_store import CATALOG_DB, CatalogStore
+from persistence import CONFIG_FILE, JOURNAL_FILE, read_state
+from references import NameMatcher, reference_text
+
+POOL_MIN_FILES = 8  # Fewer files than this are faster to do in-process
+
+matcher = None  # Set in each worker process by init_worker
+
+
+def load_matcher(db_path, pid):
+    """Build a NameMatcher from one PID's catalog in the SQLite store"""
+    store = CatalogStore(db_path)
+    if db_path == CATALOG_DB:
+        store.migrate_from_json(read_state(CONFIG_FILE, JOURNAL_FILE))
+    state = store.load_state(pid)
+    return NameMatcher((entry['name'], reference_text(pid, entry['id']))
+                       for entries in state.values() for entry in entries)
+
+
+def expand_lines(lines, matcher):
+    """Yield lines with every name replaced; names never span lines"""
+    for line in lines:
+        yield matcher.sub(line)
+
+
+def collect_files(paths, pattern):
+    """Return the files to convert: files as given, directories searched recursively"""
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend((path, file) for file in sorted(path.rglob(pattern)) if file.is_file())
+        else:
+            files.append((path.parent, path))
+    return files
+
+
+def convert_file(root, file, out_dir):
+    """Convert one file into out_dir (mirroring its path under root), or return its text"""
+    with open(file, 'r', encoding='utf-8') as f:
+        if out_dir is None:
+            return ''.join(expand_lines(f, matcher))
+        target = Path(out_dir) / file.relative_to(root)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with open(target, 'w', encoding='utf-8') as out:
+            out.writelines(expand_lines(f, matcher))
+    return None
+
+
+def init_worker(db_path, pid):
+    global matcher
+    if matcher is None:  # Forked workers inherit the parent's matcher
+        matcher = load_matcher(db_path, pid)
+
+
+def run_job(job):
+    root, file, out_dir = job
+    return convert_file(root, file, out_dir)
+
+
+def main(argv=None):
+    global matcher
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='*', help="MAQL files or directories (default: stdin)")
+    parser.add_argument('--pid', help="project whose catalog to use (default: the app's current PID)")
+    parser.add_argument('--db', type=Path, default=CATALOG_DB, help="catalog database")
+    parser.add_argument('--out', help="write converted files here instead of to stdout")
+    parser.add_argument('--glob', default='*.maql', help="files to pick up in directories")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help="worker processes")
+    args = parser.parse_args(argv)
+
+    pid = args.pid or read_state(CONFIG_FILE, JOURNAL_FILE).get('current_pid')
+    if not pid:
+        parser.error("no --pid given and no current PID saved by the app")
+    matcher = load_matcher(args.db, pid)
+    if not len(matcher):
+        print(f"Warning: the catalog for {pid} is empty", file=sys.stderr)
+
+    if not args.paths:
+        sys.stdout.writelines(expand_lines(sys.stdin, matcher))
+        return 0
+
+    files = collect_files(args.paths, args.glob)
+    jobs = [(root, file, args.out) for root, file in files]
+    try:
+        if args.jobs > 1 and len(jobs) >= POOL_MIN_FILES:
+            from concurrent.futures import ProcessPoolExecutor  # Only paid for when used
+            with ProcessPoolExecutor(args.jobs, initializer=init_worker,
+                                     initargs=(args.db, pid)) as pool:
+                # map() yields in input order, so stdout output stays deterministic
+                for text in pool.map(run_job, jobs, chunksize=max(1, len(jobs) // (args.jobs * 4))):
+                    if text is not None:
+                        sys.stdout.write(text)
+        else:
+            for root, file, out_dir in jobs:
+                if out_dir is None:
+                    with open(file, 'r', encoding='utf-8') as f:
+                        sys.stdout.writelines(expand_lines(f, matcher))
+                else:
+                    convert_file(root, file, out_dir)
+    except OSError as e:
+        print(f"Error converting files: {e}", file=sys.stderr)
+        return 1
+    if args.out:
+        print(f"Converted {len(jobs)} files into {args.out}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,73 @@
+import threading
+
+
+class Clipboard:
+    """Copies text through the Tk root's own clipboard ownership.
+
+    clipboard_clear/clipboard_append make the app the clipboard owner without
+    spawning anything, so a copy costs microseconds. pyperclip is only used
+    when Tk can't take the clipboard, and then on a background thread; it is
+    imported on first use so its backend detection stays out of startup.
+
+    On X11 the clipboard contents are served by the owning process and vanish
+    when it exits, so flush() hands the last copy to pyperclip (whose xclip/xsel
+    backends keep serving it) if the clipboard still holds it at exit.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.last_text = None  # Last text copied through Tk
+        self._pending = None  # Latest text waiting for the pyperclip thread
+        self._lock = threading.Lock()
+        self._copy_lock = threading.Lock()  # Serializes pyperclip calls
+
+    def copy(self, text):
+        """Put text on the clipboard"""
+        try:
+            self.root.clipboard_clear()
+            self.root.clipboard_append(text)
+            self.last_text = text
+        except Exception:
+            self.last_text = None
+            self._copy_in_background(text)
+
+    def _copy_in_background(self, text):
+        with self._lock:
+            self._pending = text
+        threading.Thread(target=self._drain, name='clipboard-copy', daemon=True).start()
+
+    def _drain(self):
+        with self._copy_lock:
+            with self._lock:
+                text, self._pending = self._pending, None
+            if text is None:
+                return  # A later thread already copied the newest text
+            try:
+                import pyperclip
+                pyperclip.copy(text)
+            except Exception as e:
+                print(f"Error copying to clipboard: {e}")
+
+    def owns_clipboard(self):
+        """Whether the clipboard still holds our last copy.
+
+        `selection own` can't tell: it never reports Tk's internal clipboard
+        window as the owner. Reading the contents back is served from Tk's own
+        buffer while we own it, and from the other application otherwise.
+        """
+        try:
+            return self.root.clipboard_get() == self.last_text
+        except Exception:
+            return False  # Empty, or the owner offers no text
+
+    def flush(self):
+        """Keep the last copy available after exit; call before destroying the root"""
+        if self.last_text is None or self.root.tk.call('tk', 'windowingsystem') != 'x11':
+            return
+        if not self.owns_clipboard():
+            return  # Something was copied in another application since
+        try:
+            import pyperclip
+            pyperclip.copy(self.last_text)
+        except Exception as e:
+            print(f"Error copying to clipboard: {e}")
@@ -0,0 +1,122 @@
+import codecs
+import json
+import re
+
+# The array holding the objects: query/metrics and query/attributes responses
+# list them under "entries", object exports under "items"
+OBJECTS_ARRAY = re.compile(r'"(?:entries|items)"\s*:\s*\[')
+OBJ_LINK = re.compile(r'/obj/(\w+)/?$')
+# Date dimension attributes: "date.xyz", "created.year", "closed.quarter.in.year", ...
+DATE_IDENTIFIER = re.compile(r'^(?:date|[^.]+\.(?:date|day|week|euweek|month|quarter|year))(?:\.|$)',
+                             re.IGNORECASE)
+SEPARATORS = ' \t\r\n,'
+
+_decoder = json.JSONDecoder()
+
+
+def iter_objects(f, chunk_size=1 << 16):
+    """Yield the elements of a metadata dump's object array, reading f incrementally.
+
+    f is a binary file; only one chunk plus the element being decoded is held
+    in memory, so dumps with hundreds of thousands of objects stream through.
+    The array is found by its "entries" or "items" key.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    eof = False
+
+    def fill():
+        nonlocal buffer, eof
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buffer += decoder.decode(chunk, final=eof)
+
+    # Skip to the opening bracket of the object array
+    while True:
+        match = OBJECTS_ARRAY.search(buffer)
+        if match:
+            buffer = buffer[match.end():]
+            break
+        if eof:
+            return
+        buffer = buffer[-64:]  # Keep enough to match a key split across chunks
+        fill()
+
+    pos = 0
+    while True:
+        while pos < len(buffer) and buffer[pos] in SEPARATORS:
+            pos += 1
+        if pos < len(buffer) and buffer[pos] == ']':
+            return
+        try:
+            obj, end = _decoder.raw_decode(buffer, pos)
+        except ValueError:
+            # Incomplete element at the end of the buffer: read more and retry
+            if eof:
+                raise ValueError("Unexpected end of metadata file") from None
+            buffer = buffer[pos:]
+            pos = 0
+            fill()
+            continue
+        yield obj
+        pos = end
+
+
+def classify(entry):
+    """Return (category, obj_id, name) for a metric or attribute object, or None.
+
+    Accepts both the flat query entries ({"link", "title", "category", ...})
+    and exported objects ({"metric": {"meta": {...}, "content": {...}}}).
+    Attributes of date dimensions are filed under dates.
+    """
+    if not isinstance(entry, dict):
+        return None
+    content = {}
+    if 'meta' in entry:
+        meta = entry['meta']
+        kind = meta.get('category')
+    elif len(entry) == 1:
+        kind, body = next(iter(entry.items()))
+        if not isinstance(body, dict) or 'meta' not in body:
+            return None
+        meta = body['meta']
+        content = body.get('content') or {}
+    else:
+        meta = entry
+        kind = entry.get('category')
+
+    name = meta.get('title')
+    match = OBJ_LINK.search(meta.get('link') or meta.get('uri') or '')
+    if not name or not match:
+        return None
+
+    if kind == 'metric':
+        category = 'metrics'
+    elif kind == 'attribute':
+        is_date = str(content.get('type', '')).startswith('GDC.time')
+        is_date = is_date or bool(DATE_IDENTIFIER.match(meta.get('identifier') or ''))
+        category = 'dates' if is_date else 'attributes'
+    else:
+        return None
+    return category, match.group(1), name
+
+
+def read_batches(f, batch_size=2000):
+    """Yield lists of unique (category, obj_id, name) tuples from a metadata dump.
+
+    Objects that are neither metrics nor attributes are skipped, and an id that
+    appears more than once keeps its first occurrence.
+    """
+    seen = set()
+    batch = []
+    for entry in iter_objects(f):
+        classified = classify(entry)
+        if classified is None or classified[1] in seen:
+            continue
+        seen.add(classified[1])
+        batch.append(classified)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -1,21 +1,74 @@
-import tkinter as tk
-from tkinter import ttk, simpledialog, messagebox
-import pyperclip
+import time
+STARTUP_T0 = time.perf_counter()  # Taken before the heavy imports so startup metrics include them
+
+from bisect import bisect_left, bisect_right
+import difflib
+import functools
 import json
 import os
-from pathlib import Path
+import queue
+import re
+import threading
+import tkinter as tk
+from tkinter import ttk, simpledialog, messagebox, filedialog
+from catalog import CATEGORIES, Catalog, CatalogItem
+from clipboard import Clipboard
+from catalog_cache import CatalogCache
+from batch import render_pids, write_outputs
+from catalog_store import CatalogStore
+from importer import read_batches
+from persistence import ConfigStore, merge_items
+from profiling import profiled, profiler, report_path, widget_census
+from references import (NameMatcher, Reference, expand_spans, join_references, line_offsets,
+                        locate_references, reference_text, resolve_references, Template)
+from sync import CatalogSync
+from widgets import ItemDialog, PidPickerDialog, ProfilerHUD, VirtualList
 
 BACKGROUND_COLOR = '#ffffff'  # Clean white background
 ACCENT_COLOR = '#007AFF'     # iOS blue
 SECONDARY_BG = '#f5f5f7'     # Light gray for frames
 TEXT_COLOR = '#1d1d1f'       # Dark gray for text
 
-CONFIG_DIR = Path.home() / '.gooddata_injector'
-CONFIG_FILE = CONFIG_DIR / 'config.json'
+SUGGESTION_PAGE = 20  # Suggestions ranked per keystroke; more are paged in on scroll
+SUGGESTION_LIMIT = 200  # Most suggestions ever listed for one query
+REFERENCE_TAGS = ('metric_reference', 'other_reference')
+REFERENCE_GC_MS = 1000  # Idle time after an edit before stale references are dropped
+HIGHLIGHT_CHUNK_LINES = 500  # Lines scanned for catalog names per event-loop turn
+RESOLVE_CACHE_SIZE = 4096  # Pasted (pid, id) references remembered between pastes
+PREFETCH_PIDS = 5  # Recently used PIDs loaded in the background, ready for switching
+CONFIG_POLL_MS = 1000  # How often config.json is checked for other writers' changes
+QUERY_WORD = re.compile(r'''[^\s()\[\],;=+\-*/<>"']+''')  # Words of a name being typed, between MAQL delimiters
+
+# Single source of truth for the saved objects; the panels and editor render from it
+catalog = Catalog()
+
+# Per-PID catalogs live in SQLite; config.json keeps the PIDs and mirrors the active catalog
+catalog_store = CatalogStore()
+catalog.subscribe(lambda event, item, previous:
+                  catalog_store.apply_change(catalog.pid, event, item, previous))
+# Recently used PIDs stay loaded and indexed, so switching back to them is instant
+catalog_cache = CatalogCache(catalog_store)
+recent_pids = []  # Most recently used first
+
+# Journals catalog edits to ~/.gooddata_injector in the background
+config_store = ConfigStore()
+catalog.subscribe(lambda event, item, previous:
+                  config_store.on_catalog_change(catalog.pid, event, item, previous))
 
+# Milliseconds since process start for 'first_paint_ms' and 'interactive_ms'
+startup_metrics = {}
+state_restored = False  # Set once load_app_state has swapped in the saved catalog
+config_reloading = False  # A reload of config.json changed by another writer is in progress
+
+# Catalog names the editor links automatically, rebuilt off the Tk thread when names change
+name_matcher = NameMatcher()
+matcher_building = False
+matcher_stale = False
+
+@profiled('copy_to_clipboard')
 def copy_to_clipboard(pid, obj_id, button_text):
     try:
-        pyperclip.copy(f"[/gdc/md/{pid}/obj/{obj_id}]")
+        clipboard.copy(reference_text(pid, obj_id))
         # Update status label with success message and force update
         status_label.configure(text=f'"{button_text}" has been copied to the clipboard')
         root.update_idletasks()  # Force GUI update
@@ -23,143 +76,370 @@ def copy_to_clipboard(pid, obj_id, button_text):
         status_label.configure(text=f'Error copying to clipboard: {str(e)}')
         root.update_idletasks()
 
-def create_button_command(pid_getter, obj_id, name):
-    """Create a non-lambda button command with immediate feedback"""
-    def command(event=None):  # Allow for both click and keyboard events
-        pid = pid_getter()
-        copy_to_clipboard(pid, obj_id, name)
-    return command
+def activate_item(item):
+    """Copy an item's reference when its panel row is clicked or activated"""
+    copy_to_clipboard(pid_combobox.get(), item.obj_id, item.name)
 
-def add_button(frame, pid_combobox):
+def add_button(category, pid_combobox):
     pid = pid_combobox.get()
     if not pid:
         messagebox.showwarning("Warning", "Please select or add a PID first")
         return
     
-    dialog = tk.Toplevel()
-    dialog.title("Add New Item")
-    dialog.geometry("300x180")
-    dialog.configure(bg=BACKGROUND_COLOR)
-    dialog.transient(frame)
-    dialog.grab_set()
-    
-    dialog.geometry(f"+{frame.winfo_rootx() + 50}+{frame.winfo_rooty() + 50}")
-    
-    name_label = ttk.Label(dialog, text="Name:", background=BACKGROUND_COLOR)
-    name_label.pack(pady=(10,0))
-    name_entry = ttk.Entry(dialog, width=30, style='Modern.TEntry')
-    name_entry.pack(pady=(0,10))
-    
-    id_label = ttk.Label(dialog, text="ID:", background=BACKGROUND_COLOR)
-    id_label.pack()
-    id_entry = ttk.Entry(dialog, width=30, style='Modern.TEntry')
-    id_entry.pack(pady=(0,10))
-    
-    def submit():
-        name = name_entry.get()
-        obj_id = id_entry.get()
-        if name and obj_id:
-            btn = ttk.Button(frame, text=name, style='Modern.TButton')
-            cmd = create_button_command(pid_combobox.get, obj_id, name)
-            btn.configure(command=cmd)
-            btn.bind('<Return>', cmd)
-            btn.bind('<space>', cmd)
-            btn.obj_id = obj_id
-            btn.pack(pady=5, padx=5, fill='x')
-            
-            btn.bind('<Button-3>', show_button_menu)  # Right-click on Windows/Linux
-            btn.bind('<Control-1>', show_button_menu)  # Control+click on Mac
-            
-            btn.bind('<Enter>', lambda e, b=btn: b.configure(style='ModernHover.TButton'))
-            btn.bind('<Leave>', lambda e, b=btn: b.configure(style='Modern.TButton'))
-            save_app_state()  # Save changes
-        dialog.destroy()
-
-    button_frame = ttk.Frame(dialog, style='Modern.TFrame')
-    button_frame.pack(pady=10, fill='x', padx=10)
-    
-    cancel_btn = ttk.Button(button_frame, text="Cancel", style='Modern.TButton', 
-                           command=dialog.destroy)
-    save_btn = ttk.Button(button_frame, text="Save", style='Modern.TButton', 
-                         command=submit)
-    
-    cancel_btn.pack(side='left', padx=(0,5), expand=True, fill='x')
-    save_btn.pack(side='right', padx=(5,0), expand=True, fill='x')
+    def submit(name, obj_id):
+        catalog.add(name, obj_id, category)
+        save_app_state()  # Save changes
+    
+    item_dialog.open("Add New Item", panels[category], submit)
 
+@profiled('save_app_state')
 def save_app_state():
-    """Save the current state of the app to a JSON file"""
-    if not CONFIG_DIR.exists():
-        CONFIG_DIR.mkdir(parents=True)
-    
-    app_state = {
+    """Queue the PID selection for saving; catalog edits are journaled as they happen"""
+    if not state_restored:
+        return  # Don't overwrite the saved PIDs with the still-empty combobox
+    config_store.record({
+        'op': 'pids',
         'current_pid': pid_combobox.get(),
         'saved_pids': list(pid_combobox['values']),
-        'metrics': [],
-        'attributes': [],
-        'dates': []
-    }
-    
-    # Helper function to get button data from a frame
-    def get_frame_buttons(frame):
-        buttons = []
-        for widget in frame.winfo_children():
-            if isinstance(widget, ttk.Button) and widget.cget('text') != '+':
-                try:
-                    buttons.append({
-                        'name': widget.cget('text'),
-                        'id': widget.obj_id
-                    })
-                except AttributeError:
-                    continue
-        return buttons
-    
-    app_state['metrics'] = get_frame_buttons(metrics_frame)
-    app_state['attributes'] = get_frame_buttons(attributes_frame)
-    app_state['dates'] = get_frame_buttons(dates_frame)
-    
-    with open(CONFIG_FILE, 'w') as f:
-        json.dump(app_state, f, indent=2)
+        'recent_pids': recent_pids
+    })
 
-def load_app_state():
-    """Load the saved state of the app from JSON file"""
-    if not CONFIG_FILE.exists():
+def watch_config():
+    """Check whether another instance or a script changed config.json; two stat calls while idle"""
+    global config_reloading
+    if state_restored and not config_reloading and config_store.changed_externally():
+        config_reloading = True
+        run_in_background(config_store.reload, apply_external_config)
+    root.after(CONFIG_POLL_MS, watch_config)
+
+@profiled('apply_external_config')
+def apply_external_config(result):
+    """Merge another writer's config.json into ours, touching only what it changed"""
+    global config_reloading
+    config_reloading = False
+    if isinstance(result, Exception):
+        print(f"Error reloading app state: {result}")
+        return
+    state, removed = result
+    base, config_store.mirror = config_store.mirror, state
+    # The other writer may have changed any PID in SQLite; our active catalog is merged below
+    catalog_cache.invalidate_others(catalog.pid)
+    # PIDs saved elsewhere are added; our own selection stays
+    saved = list(pid_combobox['values'])
+    added_pids = [pid for pid in state.get('saved_pids', []) if pid not in saved]
+    if added_pids:
+        pid_combobox['values'] = tuple(saved + added_pids)
+    if not catalog.pid or state.get('items_pid') != catalog.pid:
+        return  # config.json now mirrors another PID's catalog; SQLite still has ours
+    # Our edits the reload couldn't see yet win; taken now, not when the files were read
+    keep = {str(op['id']) for op in config_store.unwritten()
+            if op['op'] in ('put', 'remove') and op.get('pid') == catalog.pid}
+    puts, removed = merge_items(base, state, catalog, removed, keep)
+    if not puts and not removed:
         return
+    catalog_store.put_many(catalog.pid, puts)
+    catalog_store.remove_many(catalog.pid, removed)
+    # One 'batch' each: the panels rebind their visible rows instead of being rebuilt
+    if puts:
+        catalog.add_many(puts)
+    if removed:
+        catalog.remove_many(removed)
+    status_label.configure(text=f"config.json changed: {len(puts)} items added or updated, "
+                                f"{len(removed)} removed")
+
+def use_pid(pid):
+    """Move pid to the front of the recently used PIDs and prefetch the others"""
+    global recent_pids
+    if pid:
+        recent_pids = [pid] + [other for other in recent_pids if other != pid]
+    saved = set(pid_combobox['values'])
+    recent_pids = [other for other in recent_pids if other in saved or other == pid]
+    catalog_cache.prefetch(recent_pids[1:PREFETCH_PIDS + 1])
+
+def run_in_background(work, on_done):
+    """Run work() on a worker thread and pass its result (or exception) to on_done on the Tk thread"""
+    results = queue.Queue()
     
-    try:
-        with open(CONFIG_FILE, 'r') as f:
-            app_state = json.load(f)
-        
-        # Restore PIDs
-        if 'saved_pids' in app_state:
-            pid_combobox['values'] = tuple(app_state['saved_pids'])
-        if 'current_pid' in app_state:
-            pid_combobox.set(app_state['current_pid'])
-        
-        # Helper function to restore buttons to a frame
-        def restore_frame_buttons(frame, buttons):
-            for btn_data in buttons:
-                btn = ttk.Button(frame, text=btn_data['name'], style='Modern.TButton')
-                btn.obj_id = btn_data['id']
-                btn.configure(command=create_button_command(pid_combobox.get, btn_data['id'], btn_data['name']))
-                btn.pack(pady=5, padx=5, fill='x')
-                
-                btn.bind('<Button-3>', show_button_menu)  # Right-click on Windows/Linux
-                btn.bind('<Control-1>', show_button_menu)  # Control+click on Mac
-                
-                btn.bind('<Enter>', lambda e, btn=btn: btn.configure(style='ModernHover.TButton'))
-                btn.bind('<Leave>', lambda e, btn=btn: btn.configure(style='Modern.TButton'))
-        
-        # Restore buttons
-        restore_frame_buttons(metrics_frame, app_state.get('metrics', []))
-        restore_frame_buttons(attributes_frame, app_state.get('attributes', []))
-        restore_frame_buttons(dates_frame, app_state.get('dates', []))
+    def worker():
+        try:
+            results.put(work())
+        except Exception as e:
+            results.put(e)
+    
+    def poll():
+        try:
+            result = results.get_nowait()
+        except queue.Empty:
+            root.after(10, poll)
+            return
+        on_done(result)
+    
+    threading.Thread(target=worker, daemon=True).start()
+    root.after(10, poll)
+
+def load_app_state():
+    """Restore the saved state without keeping the window from appearing.
+
+    The PID selection is read from config.json and the active PID's catalog is
+    loaded from SQLite and indexed on a worker thread; the Tk thread only swaps
+    in the result. The first run migrates config.json's flat lists into SQLite,
+    and edits made to config.json while the app was closed are merged into the
+    catalog of the PID it mirrors.
+    """
+    def work():
+        app_state = config_store.load()
+        catalog_store.migrate_from_json(app_state)
+        merged = merge_config_items()
+        pid = app_state.get('current_pid', '')
+        return app_state, catalog_cache.load(pid), merged
+    
+    @profiled('load_app_state')
+    def done(result):
+        global state_restored, recent_pids
+        if isinstance(result, Exception):
+            print(f"Error loading app state: {result}")
+        else:
+            app_state, loaded, merged = result
+            # Restore PIDs
+            if 'saved_pids' in app_state:
+                pid_combobox['values'] = tuple(app_state['saved_pids'])
+            if 'current_pid' in app_state:
+                pid_combobox.set(app_state['current_pid'])
+            recent_pids = list(app_state.get('recent_pids', []))
+            # Swap in the restored catalog; the panels re-render from it on 'reset'
+            catalog.adopt(loaded)
+            if catalog.pid and app_state.get('items_pid') != catalog.pid:
+                # e.g. a config.json from before the mirrored PID was recorded
+                config_store.replace_items(catalog.pid, catalog.to_state())
+            if merged:
+                status_label.configure(text=f"Merged {merged} changes made to config.json meanwhile")
+        state_restored = True
+        use_pid(pid_combobox.get())
         
-    except Exception as e:
-        print(f"Error loading app state: {e}")
+        for btn in (add_metric_btn, add_attribute_btn, add_date_btn, import_button, sync_button):
+            btn.state(['!disabled'])
+        root.after_idle(record_startup_metric, 'interactive_ms')
+    
+    run_in_background(work, done)
+
+def merge_config_items():
+    """Apply edits made to config.json while the app was closed to SQLite; returns how many items changed.
+
+    Only what changed since the app last compacted config.json counts, so a
+    snapshot that lags behind SQLite, e.g. after a crash, never removes rows.
+    Runs on the loader thread, before any catalog is on screen.
+    """
+    edits = config_store.outside_edits()
+    if edits is None:
+        return 0
+    base, snapshot, removed = edits
+    pid = snapshot.get('items_pid')
+    if not pid:
+        return 0  # Written before the mirrored PID was recorded
+    mirrored = catalog_cache.load(pid)
+    puts, removed = merge_items(base, snapshot, mirrored, removed)
+    if puts:
+        catalog_store.put_many(pid, puts)
+        mirrored.add_many(puts)
+    if removed:
+        catalog_store.remove_many(pid, removed)
+        mirrored.remove_many(removed)
+    return len(puts) + len(removed)
+
+def switch_pid(pid):
+    """Show the selected PID's catalog, straight from the cache if it was used recently"""
+    def show(loaded):
+        catalog.adopt(loaded)
+        config_store.replace_items(catalog.pid, catalog.to_state())  # Keep config.json mirroring the active PID
+        use_pid(pid)
+        save_app_state()
+        status_label.configure(text=f"Loaded {len(catalog)} items for {pid}")
+    
+    cached = catalog_cache.get_verified(pid)
+    if cached is not None:
+        profiled('switch_pid')(show)(cached)
+        return
+    
+    status_label.configure(text=f"Loading catalog for {pid}...")
+    
+    @profiled('switch_pid')
+    def done(result):
+        if isinstance(result, Exception):
+            status_label.configure(text=f"Error loading catalog: {result}")
+            return
+        if pid != pid_combobox.get():
+            return  # Superseded by a later selection
+        show(result)
+    
+    run_in_background(lambda: catalog_cache.load(pid), done)
+
+def import_metadata():
+    """Bulk import a GoodData metadata dump (query/metrics, query/attributes or an object export).
+
+    A worker thread streams the file and writes each batch to SQLite; the Tk
+    thread then adds the batch to the catalog, so the panels re-render once per
+    batch while the status label reports progress.
+    """
+    pid = pid_combobox.get()
+    if not pid:
+        messagebox.showwarning("Warning", "Please select or add a PID first")
+        return
+    path = filedialog.askopenfilename(
+        title="Import GoodData metadata",
+        filetypes=[("JSON files", "*.json"), ("All files", "*.*")])
+    if not path:
+        return
+    
+    total_bytes = os.path.getsize(path) or 1
+    batches = queue.Queue()
+    
+    def worker():
+        try:
+            with open(path, 'rb') as f:
+                for batch in read_batches(f):
+                    catalog_store.put_many(pid, batch)
+                    batches.put((batch, f.tell()))
+            batches.put(None)
+        except Exception as e:
+            batches.put(e)
+    
+    imported = 0
+    
+    @profiled('import_batch')
+    def poll():
+        nonlocal imported
+        try:
+            result = batches.get_nowait()
+        except queue.Empty:
+            root.after(10, poll)
+            return
+        if isinstance(result, Exception):
+            import_button.state(['!disabled'])
+            status_label.configure(text=f"Error importing metadata: {result}")
+            return
+        if result is None:
+            import_button.state(['!disabled'])
+            if catalog.pid == pid:
+                config_store.replace_items(catalog.pid, catalog.to_state())  # Keep config.json mirroring the active PID
+            status_label.configure(text=f"Imported {imported} objects into {pid}")
+            return
+        batch, position = result
+        imported += len(batch)
+        if catalog.pid == pid:  # Another PID may have been selected meanwhile; SQLite has the batch
+            catalog.add_many(batch)
+        else:
+            catalog_cache.invalidate(pid)  # A cached copy would miss this batch
+        status_label.configure(text=f"Importing... {imported} objects "
+                                    f"({min(position / total_bytes, 1):.0%})")
+        root.after(1, poll)  # Let the panels and status redraw between batches
+    
+    import_button.state(['disabled'])
+    status_label.configure(text="Importing...")
+    threading.Thread(target=worker, daemon=True).start()
+    root.after(10, poll)
+
+def sync_catalog():
+    """Pull the selected PID's metrics and attributes from the GoodData API.
+
+    Pages are fetched concurrently over pooled connections and revalidated
+    with ETags, so a re-sync of an unchanged project transfers almost nothing.
+    The store is updated on the worker thread; the Tk thread applies the
+    changes to the catalog in one batch.
+    """
+    pid = pid_combobox.get()
+    if not pid:
+        messagebox.showwarning("Warning", "Please select or add a PID first")
+        return
+    
+    def done(result):
+        sync_button.state(['!disabled'])
+        if isinstance(result, Exception):
+            status_label.configure(text=f"Error syncing {pid}: {result}")
+            return
+        if catalog.pid == pid:
+            # The store already has both; one 'batch' each refreshes the panels and matcher once
+            catalog.add_many(result['entries'])
+            catalog.remove_many(result['removed'])
+            config_store.replace_items(catalog.pid, catalog.to_state())  # Keep config.json mirroring the active PID
+        else:
+            catalog_cache.invalidate(pid)  # Another PID was selected meanwhile; SQLite has the changes
+        status_label.configure(text=f"Synced {pid}: {len(result['entries'])} changed, "
+                                    f"{len(result['removed'])} removed, "
+                                    f"{result['not_modified']} pages unchanged")
+    
+    sync_button.state(['disabled'])
+    status_label.configure(text=f"Syncing {pid}...")
+    run_in_background(lambda: CatalogSync(catalog_store).sync(pid), done)
+
+def rebuild_name_matcher():
+    """Rebuild the editor's name matcher from the catalog on a worker thread"""
+    global matcher_building, matcher_stale
+    if matcher_building:
+        matcher_stale = True  # Rebuild again once the running build lands
+        return
+    matcher_building = True
+    matcher_stale = False
+    entries = [(item.name, item) for item in catalog]
+    
+    def done(result):
+        global name_matcher, matcher_building
+        matcher_building = False
+        if isinstance(result, Exception):
+            print(f"Error indexing names: {result}")
+        elif not matcher_stale:
+            name_matcher = result
+            code_text.mark_all_dirty()  # Link names the old matcher didn't know
+        if matcher_stale:
+            rebuild_name_matcher()
+    
+    run_in_background(lambda: NameMatcher(entries), done)
+
+@functools.lru_cache(maxsize=RESOLVE_CACHE_SIZE)
+def resolve_reference(pid, obj_id):
+    """Return the CatalogItem a pasted reference points to, or None"""
+    if pid == catalog.pid:
+        return catalog.get(obj_id)
+    row = catalog_store.get(pid, obj_id)  # A reference into another project's catalog
+    return CatalogItem(row[1], obj_id, row[0]) if row else None
+
+def on_names_change(event, item, previous):
+    """Keep the name matcher and pasted-reference cache in step with the catalog"""
+    global name_matcher
+    resolve_reference.cache_clear()
+    if event == 'reset':
+        # Another PID's catalog: its old names must not link to the new PID until the rebuild lands
+        name_matcher = NameMatcher()
+    if event == 'add' and not matcher_building:
+        name_matcher.add(item.name, item)
+        code_text.mark_all_dirty()
+    else:
+        rebuild_name_matcher()
+
+def record_startup_metric(name):
+    """Record a startup milestone and report once both milestones are known"""
+    startup_metrics[name] = round((time.perf_counter() - STARTUP_T0) * 1000, 1)
+    if 'first_paint_ms' in startup_metrics and 'interactive_ms' in startup_metrics:
+        # A restore that finishes before the first paint is interactive at the paint
+        startup_metrics['interactive_ms'] = max(startup_metrics['interactive_ms'],
+                                                startup_metrics['first_paint_ms'])
+        startup_metrics['items'] = len(catalog)
+        print(f"startup_metrics {json.dumps(startup_metrics)}")
+        status_label.configure(text=f"Loaded {len(catalog)} items in "
+                                    f"{startup_metrics['interactive_ms']:.0f} ms")
+
+def on_first_map(event):
+    """Record time-to-first-paint once the main window has been mapped and drawn"""
+    if event.widget is root and 'first_paint_ms' not in startup_metrics:
+        root.after_idle(record_startup_metric, 'first_paint_ms')
 
 # Modify the root window to save state on closing
 def on_closing():
     save_app_state()
+    config_store.close()  # Flush and compact into config.json
+    clipboard.flush()  # On X11 the clipboard would otherwise be emptied when we exit
+    if profiler:
+        profiler.dump(report_path, census=widget_census(root))
+        print(f"Profile written to {report_path}")
     root.destroy()
 
 def add_new_pid():
@@ -171,13 +451,24 @@ def add_new_pid():
             current_values.append(new_pid)
             pid_combobox['values'] = tuple(current_values)
         pid_combobox.set(new_pid)
+        switch_pid(new_pid)
 
 class AutocompleteText(tk.Text):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.suggestions = []
+        self.suggestion_query = None  # Phrase the listed suggestions were ranked for
+        self.suggestions_complete = True  # Whether every match of the query is listed
+        self.suggestion_job = None
+        self.page_job = None
         self.current_suggestion = None
-        self.references = []  # List to store references and their positions
+        self.query_length = 0  # Characters before the cursor that a suggestion replaces
+        self.references = {}  # Mark name -> Reference; the mark sits at the start of the name
+        self.next_mark = 0
+        self.gc_pending = None
+        self.dirty = False  # Whether the 'dirty_start'..'dirty_end' lines need linking
+        self.highlight_job = None
+        self.install_edit_proxy()
         
         # Configure tags for visual styling
         self.tag_configure('reference', foreground='#28a745', font=('Consolas', 11, 'bold'))
@@ -195,6 +486,7 @@ class AutocompleteText(tk.Text):
             relief='solid',
             borderwidth=1
         )
+        self.suggestion_box.configure(yscrollcommand=self.on_suggestion_scroll)
         
         # Bind events
         self.bind('<KeyRelease>', self.check_autocomplete)
@@ -203,28 +495,153 @@ class AutocompleteText(tk.Text):
         self.bind('<Down>', self.move_selection)
         self.bind('<Return>', self.apply_selection)
         self.bind('<FocusOut>', lambda e: self.after(100, self.hide_suggestions))
+        self.bind('<<Modified>>', self.schedule_reference_gc)
+        self.bind('<<Paste>>', self.paste)
         
-    def get_all_button_names(self):
-        """Get all button names from the frames"""
-        names = []
-        for frame in [metrics_frame, attributes_frame, dates_frame]:
-            for widget in frame.winfo_children():
-                if isinstance(widget, ttk.Button) and widget.cget('text') != '+':
-                    names.append({
-                        'text': widget.cget('text'),
-                        'id': widget.obj_id
-                    })
-        return names
-    
-    def get_current_word(self):
-        """Get the word currently being typed"""
+    def install_edit_proxy(self):
+        """Route the widget's Tcl command through Python to see every insert and delete.
+
+        Typing, pasting and programmatic edits all go through the widget
+        command, so this is the one place that knows which lines changed.
+        """
+        self.orig_command = self._w + '_orig'
+        self.tk.call('rename', self._w, self.orig_command)
+        self.tk.createcommand(self._w, self.dispatch)
+    
+    def dispatch(self, operation, *args):
+        # Errors from the real widget propagate: Tk's own bindings rely on them,
+        # e.g. tk_textCopy catches a failing 'get sel.first sel.last' when nothing is selected
+        orig = self.orig_command
+        if operation not in ('insert', 'delete', 'replace'):
+            return self.tk.call((orig, operation) + args)
+        try:
+            first = int(self.tk.call(orig, 'index', args[0]).split('.')[0])
+        except tk.TclError:
+            first = None  # The edit itself will report the bad index
+        result = self.tk.call((orig, operation) + args)
+        if operation == 'insert':
+            inserted = ''.join(args[1::2])
+        elif operation == 'replace':
+            inserted = ''.join(args[2::2])
+        else:
+            inserted = ''
+        if first is None:
+            self.mark_all_dirty()
+        else:
+            self.mark_dirty(first, first + inserted.count('\n'))
+        return result
+    
+    def mark_dirty(self, first, last):
+        """Queue lines first..last for linking; pending lines move along with later edits"""
+        orig = self.orig_command
+        start, end = f'{first}.0', f'{last}.0 lineend'
+        if not self.dirty:
+            self.tk.call(orig, 'mark', 'set', 'dirty_start', start)
+            self.tk.call(orig, 'mark', 'gravity', 'dirty_start', 'left')
+            self.tk.call(orig, 'mark', 'set', 'dirty_end', end)
+            self.dirty = True
+        else:
+            if self.tk.call(orig, 'compare', start, '<', 'dirty_start'):
+                self.tk.call(orig, 'mark', 'set', 'dirty_start', start)
+            if self.tk.call(orig, 'compare', end, '>', 'dirty_end'):
+                self.tk.call(orig, 'mark', 'set', 'dirty_end', end)
+        if self.highlight_job is None:
+            self.highlight_job = self.after_idle(self.highlight_step)
+    
+    def mark_all_dirty(self):
+        self.mark_dirty(1, int(self.index('end-1c').split('.')[0]))
+    
+    @profiled('highlight_step')
+    def highlight_step(self):
+        """Link catalog names in the next chunk of dirty lines"""
+        self.highlight_job = None
+        if not self.dirty:
+            return
+        first = int(self.index('dirty_start').split('.')[0])
+        last = int(self.index('dirty_end').split('.')[0])
+        stop = min(last, first + HIGHLIGHT_CHUNK_LINES - 1)
+        self.link_names(first, stop)
+        if stop >= last:
+            self.dirty = False
+            self.mark_unset('dirty_start', 'dirty_end')
+        else:
+            self.mark_set('dirty_start', f'{stop + 1}.0')
+            self.highlight_job = self.after(1, self.highlight_step)  # Let input through between chunks
+    
+    def link_names(self, first, last):
+        """Turn catalog names on lines first..last into references, leaving existing ones alone"""
+        if not len(name_matcher) or not catalog.pid:
+            return
+        start, end = f'{first}.0', f'{last}.0 lineend'
+        text = self.get(start, end)
+        offsets = line_offsets(text)
+        
+        # Spans already covered by a live reference
+        taken = []
+        for _, mark, index in self.dump(start, end, mark=True):
+            ref = self.references.get(mark)
+            if ref is None:
+                continue
+            line, column = index.split('.')
+            offset = offsets[int(line) - first] + int(column)
+            if text[offset:offset + len(ref.display)] == ref.display:
+                taken.append((offset, offset + len(ref.display)))
+        taken.sort()
+        
+        spans = []
+        pos = 0
+        for match_start, match_end, item in name_matcher.finditer(text):
+            while pos < len(taken) and taken[pos][1] <= match_start:
+                pos += 1
+            if pos < len(taken) and taken[pos][0] < match_end:
+                continue  # Overlaps a reference, e.g. one picked from the suggestions
+            line = bisect_right(offsets, match_start) - 1
+            index = f'{first + line}.{match_start - offsets[line]}'
+            spans.append((index, text[match_start:match_end], catalog.pid, item))
+        if spans:
+            self.add_references(spans)
+    
+    @profiled('paste')
+    def paste(self, event=None):
+        """Paste with raw [/gdc/md/.../obj/N] references shown as tracked object names"""
+        try:
+            text = self.clipboard_get()
+        except tk.TclError:
+            return 'break'
+        text, spans = resolve_references(text, resolve_reference)
+        if self.tag_ranges('sel'):
+            self.delete('sel.first', 'sel.last')
+        line, column = map(int, self.index('insert').split('.'))
+        self.insert('insert', text)
+        
+        # Offsets in the pasted text -> indexes in the editor
+        offsets = line_offsets(text)
+        references = []
+        for offset, name, pid, item in spans:
+            pasted_line = bisect_right(offsets, offset) - 1
+            col = offset - offsets[pasted_line] + (column if pasted_line == 0 else 0)
+            references.append((f'{line + pasted_line}.{col}', name, pid, item))
+        if references:
+            self.add_references(references)
+        self.see('insert')
+        return 'break'
+    
+    def get_query_phrases(self, max_words=3):
+        """Get the space-separated phrases ending at the cursor, longest first"""
         current_line = self.get('insert linestart', 'insert')
-        if not current_line:
-            return ''
-        words = current_line.split()
-        return words[-1] if words else ''
+        words = list(QUERY_WORD.finditer(current_line))
+        if not words or words[-1].end() != len(current_line):
+            return []
+        starts = [words[-1].start()]
+        for pos in range(len(words) - 2, -1, -1):
+            gap = current_line[words[pos].end():words[pos + 1].start()]
+            if len(starts) == max_words or not gap.isspace():
+                break
+            starts.append(words[pos].start())
+        return [current_line[start:] for start in reversed(starts)]
     
-    def show_suggestions(self, suggestions):
+    @profiled('show_suggestions')
+    def show_suggestions(self, suggestions, new_query=True):
         """Display suggestion listbox below current cursor position"""
         if not suggestions:
             self.hide_suggestions()
@@ -239,18 +656,25 @@ class AutocompleteText(tk.Text):
         x = self.winfo_rootx() + x
         y = self.winfo_rooty() + y + h + 2
         
-        # Update and show suggestion box
-        self.suggestion_box.delete(0, tk.END)
-        for item in suggestions:
-            self.suggestion_box.insert(tk.END, item['text'])
+        # Only touch the rows that changed since the last query
+        box = self.suggestion_box
+        names = [item.name for item in suggestions]
+        matcher = difflib.SequenceMatcher(None, box.get(0, tk.END), names, autojunk=False)
+        for tag, i1, i2, j1, j2 in reversed(matcher.get_opcodes()):
+            if tag in ('replace', 'delete'):
+                box.delete(i1, i2 - 1)
+            if tag in ('replace', 'insert'):
+                box.insert(i1, *names[j1:j2])
         
         # Size and position the listbox
         height = min(len(suggestions), 6)  # Show max 6 items
-        self.suggestion_box.configure(height=height)
-        self.suggestion_box.place(x=x, y=y, width=300)
+        box.configure(height=height)
+        box.place(x=x, y=y, width=300)
         
-        if not self.suggestion_box.curselection():
-            self.suggestion_box.selection_set(0)
+        if new_query or not box.curselection():
+            box.selection_clear(0, tk.END)
+            box.selection_set(0)
+            box.see(0)
     
     def hide_suggestions(self):
         """Hide the suggestion listbox"""
@@ -267,12 +691,16 @@ class AutocompleteText(tk.Text):
             return 'break'
         
         current = current[0]
+        if event.keysym == 'Down' and current == self.suggestion_box.size() - 1:
+            self.load_more_suggestions()
         if event.keysym == 'Up' and current > 0:
             self.suggestion_box.selection_clear(current)
             self.suggestion_box.selection_set(current - 1)
+            self.suggestion_box.see(current - 1)
         elif event.keysym == 'Down' and current < self.suggestion_box.size() - 1:
             self.suggestion_box.selection_clear(current)
             self.suggestion_box.selection_set(current + 1)
+            self.suggestion_box.see(current + 1)
         return 'break'
     
     def handle_selection(self, event):
@@ -281,19 +709,32 @@ class AutocompleteText(tk.Text):
             self.apply_selection(None)
     
     def check_autocomplete(self, event):
-        """Check for autocomplete suggestions"""
+        """Queue a suggestion update; keystrokes that arrive first replace the queued query"""
         if event.keysym in ('Up', 'Down', 'Return', 'Tab'):
             return
+        if self.suggestion_job is not None:
+            self.after_cancel(self.suggestion_job)
+        self.suggestion_job = self.after_idle(self.update_suggestions)
+    
+    @profiled('check_autocomplete')
+    def update_suggestions(self):
+        """Rank suggestions for the text before the cursor as it is now"""
+        self.suggestion_job = None
         
-        current_word = self.get_current_word()
-        if len(current_word) < 2:
-            self.hide_suggestions()
-            return
-        
-        # Get matching suggestions
-        all_names = self.get_all_button_names()
-        self.suggestions = [item for item in all_names 
-                          if item['text'].lower().startswith(current_word.lower())]
+        # Rank fuzzy matches for the longest trailing phrase that matches anything,
+        # so "rev net" can complete to "Net Revenue"
+        self.suggestions = []
+        self.suggestion_query = None
+        for phrase in self.get_query_phrases():
+            if len(phrase) < 2:
+                continue
+            suggestions = catalog.suggest(phrase, SUGGESTION_PAGE)
+            if suggestions:
+                self.suggestions = suggestions
+                self.suggestion_query = phrase
+                self.suggestions_complete = len(suggestions) < SUGGESTION_PAGE
+                self.query_length = len(phrase)
+                break
         
         # Show or hide suggestions
         if self.suggestions:
@@ -301,16 +742,113 @@ class AutocompleteText(tk.Text):
         else:
             self.hide_suggestions()
     
+    def load_more_suggestions(self):
+        """Page in the next suggestions for the current query"""
+        if self.suggestions_complete or self.suggestion_query is None:
+            return
+        k = min(len(self.suggestions) + SUGGESTION_PAGE, SUGGESTION_LIMIT)
+        suggestions = catalog.suggest(self.suggestion_query, k)
+        self.suggestions_complete = len(suggestions) < k or k == SUGGESTION_LIMIT
+        self.suggestions = suggestions
+        self.show_suggestions(suggestions, new_query=False)
+    
+    def on_suggestion_scroll(self, first, last):
+        """Listbox view callback; reaching the bottom pages in more suggestions"""
+        if (float(last) >= 1.0 and not self.suggestions_complete and self.page_job is None
+                and self.suggestion_box.winfo_ismapped()):
+            self.page_job = self.after_idle(self.page_in_suggestions)
+    
+    def page_in_suggestions(self):
+        self.page_job = None
+        if self.suggestion_job is None:  # A newer query is about to replace the list
+            self.load_more_suggestions()
+    
     def get_display_text(self, name):
         """Returns the display text for the editor"""
         return name
     
     def get_reference_text(self, pid, obj_id):
         """Returns the actual reference text for copying"""
-        return f"[/gdc/md/{pid}/obj/{obj_id}]"
+        return reference_text(pid, obj_id)
+    
+    def add_reference(self, index, display, pid, item):
+        """Track a name inserted at index with a mark, which Tk moves along with edits"""
+        self.add_references([(index, display, pid, item)])
+    
+    def add_references(self, spans):
+        """Track many (index, display, pid, item) names, tagging them with one call per tag"""
+        orig = self.orig_command
+        ranges = {tag: [] for tag in REFERENCE_TAGS}
+        for index, display, pid, item in spans:
+            mark = f'ref{self.next_mark}'
+            self.next_mark += 1
+            # Right gravity: typing just before the name pushes the mark along
+            self.tk.call(orig, 'mark', 'set', mark, index)
+            self.references[mark] = Reference(display, pid, item.obj_id, item.category)
+            tag_name = 'metric_reference' if item.category == 'metrics' else 'other_reference'
+            ranges[tag_name].extend((index, f'{index}+{len(display)}c'))
+        for tag_name, indexes in ranges.items():
+            if indexes:
+                self.tag_add(tag_name, *indexes)
+
+    def collect_references(self, text=None):
+        """Return (start, end, Reference) offsets of the live references, in text order.
+
+        A reference is live while the text at its mark is still exactly the
+        inserted name, not glued to a word on either side. Deleted or edited
+        ones are unset and lose their styling here, so the registry only holds
+        references that are still in the editor.
+        """
+        if text is None:
+            text = self.get('1.0', 'end-1c')
+        # One dump returns every mark in text order
+        marks = [(mark, index) for _, mark, index in self.dump('1.0', 'end', mark=True)]
+        references = self.references
+        spans, stale = locate_references(text, marks, references)
+
+        starts = [start for start, _, _ in spans]
+        for mark, start, ref in stale:
+            # Unstyle what is left of the name, stopping at the next live reference
+            pos = bisect_left(starts, start)
+            limit = starts[pos] if pos < len(starts) else len(text)
+            length = min(len(ref.display), limit - start)
+            if length > 0:
+                for tag in REFERENCE_TAGS:
+                    self.tag_remove(tag, mark, f'{mark}+{length}c')
+            self.mark_unset(mark)
+            del references[mark]
+        return spans
+
+    def schedule_reference_gc(self, event=None):
+        """Collect stale references once the editor has been idle for a moment"""
+        if not self.edit_modified():
+            return  # Fired by our own reset of the modified flag
+        # Every edit pushes the collection back, so it only runs once typing pauses
+        if self.gc_pending is not None:
+            self.after_cancel(self.gc_pending)
+            self.gc_pending = None
+        if self.references:
+            self.gc_pending = self.after(REFERENCE_GC_MS, self.run_reference_gc)
+        self.edit_modified(False)
+
+    @profiled('reference_gc')
+    def run_reference_gc(self):
+        self.gc_pending = None
+        self.collect_references()
+
+    def get_expanded_text(self):
+        """Return the editor text with every live reference replaced, in one pass"""
+        text = self.get('1.0', 'end-1c')
+        spans = [(start, end, ref.text) for start, end, ref in self.collect_references(text)]
+        return expand_spans(text, spans)
     
     def apply_selection(self, event):
         """Apply the selected suggestion"""
+        if self.suggestion_job is not None:
+            # Accepted before the last keystroke was ranked: rank it now so the
+            # right phrase gets replaced
+            self.after_cancel(self.suggestion_job)
+            self.update_suggestions()
         if not self.suggestion_box.winfo_viewable():
             return
         
@@ -320,134 +858,65 @@ class AutocompleteText(tk.Text):
         
         selected_item = self.suggestions[selection[0]]
         
-        # Determine which frame the button belongs to
-        button_frame = None
-        for widget in metrics_frame.winfo_children():
-            if isinstance(widget, ttk.Button) and widget.cget('text') == selected_item['text']:
-                button_frame = 'metrics'
-                break
-        if not button_frame:
-            for frame in [attributes_frame, dates_frame]:
-                for widget in frame.winfo_children():
-                    if isinstance(widget, ttk.Button) and widget.cget('text') == selected_item['text']:
-                        button_frame = 'other'
-                        break
-                if button_frame:
-                    break
+        # Calculate positions of the phrase the suggestions were ranked for
+        start_pos = f"insert-{self.query_length}c"
         
-        # Get the current line up to the cursor
-        current_line = self.get('insert linestart', 'insert')
-        words = current_line.split()
-        if not words:
-            return 'break'
-        
-        # Calculate positions
-        current_word = words[-1]
-        start_pos = f"insert-{len(current_word)}c"
-        
-        # Replace the current word with the styled display text
+        # Replace the typed phrase with the styled display text
         self.delete(start_pos, 'insert')
-        display_text = self.get_display_text(selected_item['text'])
+        display_text = self.get_display_text(selected_item.name)
         
-        # Store reference information
+        # Track the inserted name so it can be expanded on copy
         start_index = self.index('insert')
         self.insert('insert', display_text)
-        end_index = self.index('insert')
-        
-        # Add to references list
-        reference = self.get_reference_text(pid_combobox.get(), selected_item['id'])
-        self.references.append({
-            'display': display_text,
-            'reference': reference,
-            'start': start_index,
-            'end': end_index
-        })
-        
-        # Apply appropriate tag based on the source frame
-        tag_name = 'metric_reference' if button_frame == 'metrics' else 'other_reference'
-        self.tag_add(tag_name, start_index, end_index)
+        self.add_reference(start_index, display_text, pid_combobox.get(), selected_item)
         
         # Hide suggestions
         self.hide_suggestions()
         return 'break'
 
-def edit_button(button):
-    """Edit an existing button's name and ID"""
-    dialog = tk.Toplevel()
-    dialog.title("Edit Item")
-    dialog.geometry("300x180")
-    dialog.configure(bg=BACKGROUND_COLOR)
-    dialog.transient(button.winfo_toplevel())
-    dialog.grab_set()
-    
-    # Position dialog near the button
-    dialog.geometry(f"+{button.winfo_rootx() + 50}+{button.winfo_rooty() + 50}")
-    
-    # Current values
-    current_name = button.cget('text')
-    current_id = button.obj_id
-    
-    name_label = ttk.Label(dialog, text="Name:", background=BACKGROUND_COLOR)
-    name_label.pack(pady=(10,0))
-    name_entry = ttk.Entry(dialog, width=30, style='Modern.TEntry')
-    name_entry.insert(0, current_name)
-    name_entry.pack(pady=(0,10))
-    
-    id_label = ttk.Label(dialog, text="ID:", background=BACKGROUND_COLOR)
-    id_label.pack()
-    id_entry = ttk.Entry(dialog, width=30, style='Modern.TEntry')
-    id_entry.insert(0, current_id)
-    id_entry.pack(pady=(0,10))
-    
-    def submit():
-        new_name = name_entry.get()
-        new_id = id_entry.get()
-        if new_name and new_id:
-            button.configure(text=new_name)
-            button.obj_id = new_id
-            # Update the button command with new values
-            cmd = create_button_command(pid_combobox.get, new_id, new_name)
-            button.configure(command=cmd)
-            button.bind('<Return>', cmd)
-            button.bind('<space>', cmd)
-            
-            # Reapply hover bindings
-            button.bind('<Enter>', lambda e, b=button: b.configure(style='ModernHover.TButton'))
-            button.bind('<Leave>', lambda e, b=button: b.configure(style='Modern.TButton'))
-            
-            save_app_state()  # Save changes
-        dialog.destroy()
-    
-    button_frame = ttk.Frame(dialog, style='Modern.TFrame')
-    button_frame.pack(pady=10, fill='x', padx=10)
-    
-    cancel_btn = ttk.Button(button_frame, text="Cancel", style='Modern.TButton', 
-                           command=dialog.destroy)
-    save_btn = ttk.Button(button_frame, text="Save", style='Modern.TButton', 
-                         command=submit)
-    
-    cancel_btn.pack(side='left', padx=(0,5), expand=True, fill='x')
-    save_btn.pack(side='right', padx=(5,0), expand=True, fill='x')
-
-def delete_button(button):
-    """Delete a button after confirmation"""
+def edit_button(item):
+    """Edit an existing item's name and ID"""
+    def submit(new_name, new_id):
+        catalog.update(item, name=new_name, obj_id=new_id)
+        save_app_state()  # Save changes
+    
+    item_dialog.open("Edit Item", panels[item.category], submit, item.name, item.obj_id)
+
+def delete_button(item):
+    """Delete an item after confirmation"""
     if messagebox.askyesno("Confirm Delete", 
-                          f"Are you sure you want to delete '{button.cget('text')}'?"):
-        button.destroy()
+                          f"Are you sure you want to delete '{item.name}'?"):
+        catalog.remove(item)
         save_app_state()  # Save changes
 
-def show_button_menu(event):
-    """Show context menu for button"""
-    button = event.widget
-    menu = tk.Menu(root, tearoff=0)
-    menu.add_command(label="Edit", 
-                    command=lambda: edit_button(button))
-    menu.add_command(label="Delete", 
-                    command=lambda: delete_button(button))
-    menu.post(event.x_root, event.y_root)
+def show_button_menu(event, item):
+    """Show the shared context menu for a panel row"""
+    global menu_item
+    menu_item = item
+    try:
+        item_menu.tk_popup(event.x_root, event.y_root)
+    finally:
+        item_menu.grab_release()
+
+def lifecycle_check(iterations=1000):
+    """Open and close the context menu and item dialog repeatedly, reporting the widget census"""
+    before = widget_census(root)
+    item = next(iter(catalog), None) or CatalogItem("Example", "0", 'metrics')
+    for _ in range(iterations):
+        item_menu.post(root.winfo_rootx(), root.winfo_rooty())
+        item_menu.unpost()
+        edit_button(item)
+        item_dialog.close()
+    root.update_idletasks()
+    after = widget_census(root)
+    print(f"lifecycle_check {json.dumps({'iterations': iterations, 'before': before, 'after': after})}")
+    status_label.configure(text=f"{iterations} menu/dialog cycles: widgets {before['widgets']} -> "
+                                f"{after['widgets']}, Tcl commands {before['tcl_commands']} -> "
+                                f"{after['tcl_commands']}")
 
 root = tk.Tk()
 root.title("GoodData Injector")
+clipboard = Clipboard(root)  # Copies through Tk; pyperclip only as a fallback
 
 style = ttk.Style(root)
 style.theme_use('clam')
@@ -481,6 +950,8 @@ style.configure('Modern.TEntry',
 style.configure('Modern.TLabelframe',
     background=SECONDARY_BG,
     padding=15)
+style.configure('Panel.TFrame',
+    background=SECONDARY_BG)
 style.configure('Modern.TLabelframe.Label',
     background=SECONDARY_BG,
     foreground=TEXT_COLOR,
@@ -520,10 +991,19 @@ pid_label.grid(row=0, column=0, sticky="w")
 pid_combobox = ttk.Combobox(pid_frame, style='Modern.TCombobox', width=30, state='readonly')
 pid_combobox.grid(row=0, column=1, sticky="ew", padx=(5, 5))
 
+pid_combobox.bind('<<ComboboxSelected>>', lambda e: switch_pid(pid_combobox.get()))
+
 add_pid_button = ttk.Button(pid_frame, text="+", style='Add.TButton', 
                            command=add_new_pid, width=3)
 add_pid_button.grid(row=0, column=2, sticky="e")
 
+import_button = ttk.Button(pid_frame, text="Import...", style='Add.TButton',
+                           command=import_metadata)
+import_button.grid(row=0, column=3, sticky="e", padx=(5, 0))
+
+sync_button = ttk.Button(pid_frame, text="Sync", style='Add.TButton', command=sync_catalog)
+sync_button.grid(row=0, column=4, sticky="e", padx=(5, 0))
+
 metrics_frame = ttk.LabelFrame(main_frame, text="Metrics", style='Modern.TLabelframe')
 attributes_frame = ttk.LabelFrame(main_frame, text="Attributes", style='Modern.TLabelframe')
 dates_frame = ttk.LabelFrame(main_frame, text="Dates", style='Modern.TLabelframe')
@@ -531,12 +1011,48 @@ metrics_frame.grid(row=1, column=0, padx=5, pady=5, sticky="nsew")
 attributes_frame.grid(row=1, column=1, padx=5, pady=5, sticky="nsew")
 dates_frame.grid(row=1, column=2, padx=5, pady=5, sticky="nsew")
 
-add_metric_btn = ttk.Button(metrics_frame, text="+", style='Add.TButton', command=lambda: add_button(metrics_frame, pid_combobox))
+def create_panel_list(frame, category):
+    """Create the virtualized item list that renders one catalog category"""
+    panel = VirtualList(frame, on_activate=activate_item, on_menu=show_button_menu,
+                        style='Panel.TFrame')
+    panel.pack(fill='both', expand=True)
+    panel.set_items(catalog.items(category))
+    return panel
+
+def on_catalog_change(event, item, previous):
+    """Re-render the panels affected by a catalog change"""
+    if event == 'reset':
+        for category in CATEGORIES:
+            panels[category].set_items(catalog.items(category))
+    elif event in ('update', 'batch'):
+        for panel in panels.values():  # Items may have moved between categories
+            panel.refresh()
+    else:
+        panels[item.category].refresh()
+
+add_metric_btn = ttk.Button(metrics_frame, text="+", style='Add.TButton', command=lambda: add_button('metrics', pid_combobox))
 add_metric_btn.pack(pady=5, fill='x')
-add_attribute_btn = ttk.Button(attributes_frame, text="+", style='Add.TButton', command=lambda: add_button(attributes_frame, pid_combobox))
+add_attribute_btn = ttk.Button(attributes_frame, text="+", style='Add.TButton', command=lambda: add_button('attributes', pid_combobox))
 add_attribute_btn.pack(pady=5, fill='x')
-add_date_btn = ttk.Button(dates_frame, text="+", style='Add.TButton', command=lambda: add_button(dates_frame, pid_combobox))
+add_date_btn = ttk.Button(dates_frame, text="+", style='Add.TButton', command=lambda: add_button('dates', pid_combobox))
 add_date_btn.pack(pady=5, fill='x')
+for btn in (add_metric_btn, add_attribute_btn, add_date_btn, import_button, sync_button):
+    btn.state(['disabled'])  # Enabled once the saved catalog has been restored
+
+# One context menu and one Add/Edit dialog, reused for every row
+menu_item = None  # Item the context menu was last opened for
+item_menu = tk.Menu(root, tearoff=0)
+item_menu.add_command(label="Edit", command=lambda: edit_button(menu_item))
+item_menu.add_command(label="Delete", command=lambda: delete_button(menu_item))
+item_dialog = ItemDialog(root, BACKGROUND_COLOR)
+pid_picker = PidPickerDialog(root, BACKGROUND_COLOR)
+
+panels = {
+    'metrics': create_panel_list(metrics_frame, 'metrics'),
+    'attributes': create_panel_list(attributes_frame, 'attributes'),
+    'dates': create_panel_list(dates_frame, 'dates'),
+}
+catalog.subscribe(on_catalog_change)
 
 # Add this after the frames are created but before root.mainloop()
 status_label = ttk.Label(main_frame, text="", font=('SF Pro Display', 10), foreground=TEXT_COLOR)
@@ -544,7 +1060,14 @@ status_label.grid(row=2, column=0, columnspan=3, pady=(10,0), sticky="ew")
 
 # Add these lines before root.mainloop()
 root.protocol("WM_DELETE_WINDOW", on_closing)
-load_app_state()
+root.bind('<Map>', on_first_map, '+')
+
+# Opt-in latency overlay, enabled with GOODDATA_INJECTOR_PROFILE=1
+if profiler:
+    style.configure('HUD.TLabel', background='#1d1d1f', foreground='#f5f5f7',
+                    font=('Consolas', 9), padding=(6, 4))
+    profiler_hud = ProfilerHUD(root, profiler, census=lambda: widget_census(root))
+    root.bind('<Control-Shift-L>', lambda e: lifecycle_check())  # Widget counts should not grow
 
 # Add these lines before root.mainloop() but after creating the main UI elements
 code_frame = ttk.Frame(main_frame)
@@ -568,26 +1091,135 @@ code_text.grid(row=0, column=0, sticky="ew")
 code_scrollbar = ttk.Scrollbar(code_frame, orient='vertical', command=code_text.yview)
 code_scrollbar.grid(row=0, column=1, sticky='ns')
 code_text.configure(yscrollcommand=code_scrollbar.set)
+catalog.subscribe(on_names_change)  # Auto-link catalog names typed or pasted into the editor
 
+@profiled('copy_code_content')
 def copy_code_content():
     """Copy the contents of the code text box to clipboard, replacing display text with references"""
-    # Get all text
-    final_text = code_text.get("1.0", tk.END).strip()
+    # Expand the tagged references, leaving plain-text occurrences of names alone
+    final_text = code_text.get_expanded_text().strip()
     if not final_text:
         status_label.configure(text="No code to copy")
         root.update_idletasks()
         return
     
-    # Replace all references
-    if hasattr(code_text, 'references'):
-        # Process references in reverse order to avoid position issues
-        for ref in reversed(code_text.references):
-            final_text = final_text.replace(ref['display'], ref['reference'])
-    
-    pyperclip.copy(final_text)
+    clipboard.copy(final_text)
     status_label.configure(text="Code copied to clipboard!")
     root.update_idletasks()
 
+def retarget_references():
+    """Point every reference in the editor at the same-named objects in another PID.
+
+    Object ids differ between projects, so names are matched instead: the
+    target catalog is joined against the references by (category, name) on a
+    worker thread, and the matched references are updated in place, leaving
+    the editor text alone. Unmatched references keep their old target.
+    """
+    target = simpledialog.askstring("Retarget References", "Retarget the script's references to PID:")
+    if not target:
+        return
+    refs = [ref for _, _, ref in code_text.collect_references()]
+    if not refs:
+        status_label.configure(text="No references to retarget")
+        return
+    
+    # Snapshot what the worker needs from the live catalog on the Tk thread
+    current_pid = catalog.pid
+    current_names = {}
+    for ref in refs:
+        item = catalog.get(ref.obj_id) if ref.pid == current_pid else None
+        if item is not None:
+            current_names[ref.obj_id] = item.name
+    current_items = list(catalog) if target == current_pid else None
+    
+    def work():
+        sources = {pid: catalog_cache.load(pid) for pid in {ref.pid for ref in refs} if pid != current_pid}
+        
+        def source_name(ref):
+            if ref.pid == current_pid:
+                return current_names.get(ref.obj_id, ref.display)
+            item = sources[ref.pid].get(ref.obj_id)
+            return item.name if item is not None else ref.display
+        
+        target_items = current_items if current_items is not None else catalog_cache.load(target)
+        return join_references(refs, source_name, target_items)
+    
+    @profiled('retarget_references')
+    def done(result):
+        if isinstance(result, Exception):
+            status_label.configure(text=f"Error retargeting references: {result}")
+            return
+        matched, unresolved = result
+        for ref, obj_id in matched:
+            ref.pid = target
+            ref.obj_id = obj_id
+        status_label.configure(text=f"Retargeted {len(matched)} references to {target}, "
+                                    f"{len(unresolved)} unresolved")
+        if unresolved:
+            names = sorted({ref.display for ref in unresolved})
+            shown = '\n'.join(names[:20]) + (f"\n...and {len(names) - 20} more" if len(names) > 20 else '')
+            messagebox.showwarning("Unresolved References",
+                                   f"No object with the same name in {target}:\n\n{shown}")
+        # Names typed from now on should link into the target project too
+        if target not in pid_combobox['values']:
+            pid_combobox['values'] = tuple(pid_combobox['values']) + (target,)
+        if target != pid_combobox.get():
+            pid_combobox.set(target)
+            switch_pid(target)
+    
+    status_label.configure(text=f"Retargeting {len(refs)} references to {target}...")
+    run_in_background(work, done)
+
+def render_for_pids():
+    """Render the editor's script for many PIDs at once, into a folder or a zip archive.
+
+    The script is parsed once into a template of literal text and named object
+    slots; each PID then only needs its ids for those names, so hundreds of
+    PIDs render in seconds on a worker pool.
+    """
+    text = code_text.get('1.0', 'end-1c')
+    if not text.strip():
+        status_label.configure(text="No code to render")
+        return
+    slots = []
+    for start, end, ref in code_text.collect_references(text):
+        item = resolve_reference(ref.pid, ref.obj_id)  # Its name now, in case it was renamed
+        slots.append((start, end, ref.category, item.name if item is not None else ref.display, ref.text))
+    template = Template(text, slots)
+    
+    def submit(pids):
+        as_zip = messagebox.askyesnocancel(
+            "Render for PIDs", "Write a single zip archive?\n\nNo writes one file per PID into a folder.")
+        if as_zip is None:
+            return
+        if as_zip:
+            out = filedialog.asksaveasfilename(title="Save rendered scripts", defaultextension='.zip',
+                                               filetypes=[("Zip archives", "*.zip")])
+        else:
+            out = filedialog.askdirectory(title="Folder for the rendered scripts")
+        if not out:
+            return
+        
+        def done(result):
+            render_button.state(['!disabled'])
+            if isinstance(result, Exception):
+                status_label.configure(text=f"Error rendering scripts: {result}")
+                return
+            status_label.configure(text=f"Rendered {len(pids)} PIDs into {out}"
+                                        + (f", {len(result)} with unresolved names" if result else ""))
+            if result:
+                shown = '\n'.join(f"{pid}: {', '.join(name for _, name in keys)}"
+                                  for pid, keys in list(result.items())[:20])
+                messagebox.showwarning("Unresolved References",
+                                       f"Some names have no object in these PIDs; their original "
+                                       f"references were kept:\n\n{shown}")
+        
+        render_button.state(['disabled'])
+        status_label.configure(text=f"Rendering {len(template)} references for {len(pids)} PIDs...")
+        run_in_background(lambda: write_outputs(render_pids(template, pids, catalog_store), out), done)
+    
+    pid_picker.open("Render for PIDs", code_text, pid_combobox['values'], submit, submit_text="Render...")
+
 copy_button = ttk.Button(
     code_frame,
     text="Copy Code",
@@ -596,4 +1228,24 @@ copy_button = ttk.Button(
 )
 copy_button.grid(row=1, column=0, columnspan=2, pady=(5, 0), sticky="ew")
 
+retarget_button = ttk.Button(
+    code_frame,
+    text="Retarget to PID...",
+    style='Modern.TButton',
+    command=retarget_references
+)
+retarget_button.grid(row=2, column=0, columnspan=2, pady=(5, 0), sticky="ew")
+
+render_button = ttk.Button(
+    code_frame,
+    text="Render for PIDs...",
+    style='Modern.TButton',
+    command=render_for_pids
+)
+render_button.grid(row=3, column=0, columnspan=2, pady=(5, 0), sticky="ew")
+
+# Restore in the background once the window is up
+load_app_state()
+root.after(CONFIG_POLL_MS, watch_config)
+
 root.mainloop()
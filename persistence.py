@@ -0,0 +1,355 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows; writers there are not serialized across processes
+    fcntl = None
+
+from catalog import CATEGORIES
+
+CONFIG_DIR = Path.home() / '.gooddata_injector'
+CONFIG_FILE = CONFIG_DIR / 'config.json'
+JOURNAL_FILE = CONFIG_DIR / 'config.journal'
+LOCK_FILE = CONFIG_DIR / 'config.lock'
+BASE_FILE = CONFIG_DIR / 'config.base.json'  # Copy of the last snapshot the app itself wrote
+
+
+def write_atomic(path, text):
+    """Write text to path via a temp file and rename, so readers never see a partial file"""
+    path = Path(path)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, 'w') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive lock on path for the duration, across processes"""
+    if fcntl is None:
+        yield
+        return
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a') as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def file_signature(*paths):
+    """Return a cheap fingerprint of the files (mtime, size, inode) that changes whenever they do"""
+    signature = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            signature.append((st.st_mtime_ns, st.st_size, st.st_ino))
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def read_journal(journal_file):
+    """Return the ops in a journal file, ignoring a torn last line from a crash"""
+    ops = []
+    try:
+        with open(journal_file, 'r') as f:
+            for line in f:
+                try:
+                    ops.append(json.loads(line))
+                except ValueError:
+                    break
+    except FileNotFoundError:
+        pass
+    return ops
+
+
+def apply_ops(state, ops, removed=None):
+    """Return a new config dict with journal ops replayed on top of state.
+
+    Ops are idempotent: 'put' upserts an item by id, 'remove' drops an id,
+    'reset' replaces every item and 'pids' replaces the PID selection, so
+    replaying a journal twice is harmless.
+
+    The items mirror one PID's catalog, recorded as 'items_pid' by the last
+    reset. Item ops carry the PID they were made in and are skipped when it
+    isn't the mirrored one; SQLite has them either way. If a removed set is
+    given, the ids that 'remove' ops deleted from the final mirror are added
+    to it.
+    """
+    items = {}  # id -> (category, name), in file order
+    for category in CATEGORIES:
+        for entry in state.get(category, []):
+            items.setdefault(str(entry['id']), (category, entry['name']))
+
+    result = {key: value for key, value in state.items() if key not in CATEGORIES}
+    for op in ops:
+        kind = op.get('op')
+        if kind in ('put', 'remove') and op.get('pid') != result.get('items_pid'):
+            continue
+        if kind == 'put':
+            items[str(op['id'])] = (op['category'], op['name'])
+            if removed is not None:
+                removed.discard(str(op['id']))
+        elif kind == 'remove':
+            items.pop(str(op['id']), None)
+            if removed is not None:
+                removed.add(str(op['id']))
+        elif kind == 'reset':
+            if removed is not None and op.get('pid') != result.get('items_pid'):
+                removed.clear()  # Those were another PID's ids
+            result['items_pid'] = op.get('pid')
+            items = {}
+            for category in CATEGORIES:
+                for entry in op.get(category, []):
+                    items.setdefault(str(entry['id']), (category, entry['name']))
+        elif kind == 'pids':
+            result['current_pid'] = op['current_pid']
+            result['saved_pids'] = op['saved_pids']
+            if 'recent_pids' in op:
+                result['recent_pids'] = op['recent_pids']
+
+    for category in CATEGORIES:
+        result[category] = []
+    for obj_id, (category, name) in items.items():
+        result[category].append({'name': name, 'id': obj_id})
+    return result
+
+
+def item_map(state):
+    """Return {obj_id: (category, name)} for a config dict's items, first entry per id winning"""
+    items = {}
+    for category in CATEGORIES:
+        for entry in state.get(category, []):
+            items.setdefault(str(entry['id']), (category, entry['name']))
+    return items
+
+
+def merge_items(base, state, items, removed, keep=()):
+    """Three-way merge of another writer's config items into catalog items.
+
+    base is the config dict as last read and state the one on disk now. Returns
+    (puts, removed_ids): (category, obj_id, name) for the entries state changed
+    since base that items doesn't have yet, and the ids in removed that items
+    still has. Ids in keep, e.g. with edits of ours not written yet, are left
+    alone. Without a common base (it mirrored another PID), only entries items
+    lacks are put: a reset is a copy of some catalog, not a list of changes.
+    """
+    current = {item.obj_id: item for item in items}
+    same_pid = base.get('items_pid') == state.get('items_pid')
+    before = item_map(base) if same_pid else {}
+    puts = []
+    for obj_id, (category, name) in item_map(state).items():
+        if obj_id in keep or before.get(obj_id) == (category, name):
+            continue
+        item = current.get(obj_id)
+        if item is None or (same_pid and (item.category, item.name) != (category, name)):
+            puts.append((category, obj_id, name))
+    removed_ids = [obj_id for obj_id in removed if obj_id in current and obj_id not in keep]
+    return puts, removed_ids
+
+
+def read_state(config_file=CONFIG_FILE, journal_file=JOURNAL_FILE):
+    """Load the config snapshot and replay any journaled changes on top of it"""
+    state = {}
+    if Path(config_file).exists():
+        with open(config_file, 'r') as f:
+            state = json.load(f)
+    ops = read_journal(journal_file)
+    return apply_ops(state, ops) if ops else state
+
+
+class ConfigStore:
+    """Append-only journal for config.json with debounced, background writes.
+
+    Changes are queued with record() and appended to the journal by a writer
+    thread at most once every `delay` seconds, so a burst of edits becomes one
+    write. Once the journal holds `compact_every` ops it is folded into a new
+    config.json snapshot (written atomically) and truncated. close() flushes
+    and compacts, leaving a plain config.json behind.
+
+    Several app instances (and scripts) may share the files. Appends and
+    compactions hold a file lock, and compaction replays the journal onto
+    whatever config.json is on disk, so concurrent writes merge. Writes by
+    others are noticed with changed_externally(), two stat calls, and read
+    back with reload(); `mirror` keeps the state last read, the base for
+    merging the next one. Each compaction also leaves a copy of the snapshot
+    in config.base.json, so edits made to config.json while the app was
+    closed can be told apart with outside_edits().
+    """
+
+    def __init__(self, config_file=CONFIG_FILE, journal_file=JOURNAL_FILE,
+                 delay=0.5, compact_every=1000):
+        self.config_file = Path(config_file)
+        self.journal_file = Path(journal_file)
+        self.lock_file = self.config_file.with_name(LOCK_FILE.name)
+        self.base_file = self.config_file.with_name(BASE_FILE.name)
+        self.delay = delay
+        self.compact_every = compact_every
+        self._pending = {}  # Coalesced ops keyed by what they change
+        self._in_flight = []  # Ops taken from _pending that are being written
+        self._seen = None  # Signature of the files as of our last read or write
+        self.mirror = {}  # The state as of our last read, without our own writes since
+        self._journaled = len(read_journal(self.journal_file))
+        self._cond = threading.Condition()
+        self._closing = False
+        self._thread = threading.Thread(target=self._run, name='config-writer', daemon=True)
+        self._thread.start()
+
+    def _signature(self):
+        return file_signature(self.config_file, self.journal_file)
+
+    def load(self):
+        """Return the persisted app state in the config.json format"""
+        self._seen = self._signature()
+        self.mirror = read_state(self.config_file, self.journal_file)
+        return self.mirror
+
+    def changed_externally(self):
+        """Whether another process wrote config.json or the journal since our last read or write"""
+        return self._signature() != self._seen
+
+    def reload(self):
+        """Return (state, removed) as on disk now, for merging with merge_items().
+
+        removed holds the ids that journaled 'remove' ops deleted from the
+        mirrored items. Safe to call from a worker thread; `mirror` is left for
+        the caller to move on once the state has been merged.
+        """
+        self._seen = self._signature()
+        state = {}
+        if self.config_file.exists():
+            with open(self.config_file, 'r') as f:
+                state = json.load(f)
+        removed = set()
+        return apply_ops(state, read_journal(self.journal_file), removed), removed
+
+    def unwritten(self):
+        """Return the ops queued or being written, which a reload doesn't see yet"""
+        with self._cond:
+            return self._in_flight + list(self._pending.values())
+
+    def outside_edits(self):
+        """Return (base, snapshot, removed) if config.json was edited since the app last compacted it.
+
+        base is the snapshot that compaction wrote and removed the ids the edit
+        dropped from the same PID's items, for merge_items(). Returns None when
+        nothing was edited, and for files from before the copy was kept.
+        """
+        try:
+            with open(self.base_file, 'rb') as f:
+                base = f.read()
+            with open(self.config_file, 'rb') as f:
+                snapshot = f.read()
+        except FileNotFoundError:
+            return None
+        if base == snapshot:
+            return None
+        base, snapshot = json.loads(base), json.loads(snapshot)
+        removed = set()
+        if base.get('items_pid') == snapshot.get('items_pid'):
+            removed = set(item_map(base)) - set(item_map(snapshot))
+        return base, snapshot, removed
+
+    def record(self, op):
+        """Queue a journal op; later ops for the same target replace earlier ones"""
+        if op['op'] in ('pids', 'reset'):
+            key = op['op']
+        else:
+            key = ('item', op.get('pid'), str(op['id']))
+        with self._cond:
+            if key == 'reset':
+                # A reset supersedes every queued item op
+                self._pending = {k: v for k, v in self._pending.items() if k == 'pids'}
+            self._pending.pop(key, None)
+            self._pending[key] = op
+            self._cond.notify()
+
+    def replace_items(self, pid, items_state):
+        """Queue a reset of every item to one PID's, e.g. after switching to its catalog"""
+        self.record({'op': 'reset', 'pid': pid, **items_state})
+
+    def on_catalog_change(self, pid, event, item, previous=None):
+        """Journal a Catalog add/update/remove event for the catalog of the given PID"""
+        if event == 'remove':
+            self.record({'op': 'remove', 'pid': pid, 'id': item.obj_id})
+        elif event in ('add', 'update'):
+            if previous is not None and previous.obj_id != item.obj_id:
+                self.record({'op': 'remove', 'pid': pid, 'id': previous.obj_id})
+            self.record({'op': 'put', 'pid': pid, 'category': item.category,
+                         'name': item.name, 'id': item.obj_id})
+
+    def close(self):
+        """Flush pending ops, compact the journal and stop the writer thread"""
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closing:
+                    self._cond.wait()
+                # Let a burst of edits accumulate so it becomes a single write
+                deadline = time.monotonic() + self.delay
+                while not self._closing and time.monotonic() < deadline:
+                    self._cond.wait(deadline - time.monotonic())
+                ops = list(self._pending.values())
+                self._pending = {}
+                self._in_flight = ops
+                closing = self._closing
+
+            try:
+                if ops:
+                    self._append(ops)
+                reset = any(op['op'] == 'reset' for op in ops)
+                if closing or reset or self._journaled >= self.compact_every:
+                    self.compact()
+            except OSError as e:
+                print(f"Error saving app state: {e}")
+            with self._cond:
+                self._in_flight = []
+            if closing:
+                return
+
+    @contextmanager
+    def _writing(self):
+        """Hold the file lock, and keep our own write from counting as an external change"""
+        self.config_file.parent.mkdir(parents=True, exist_ok=True)
+        with file_lock(self.lock_file):
+            before = self._signature()
+            yield
+            if before == self._seen:
+                self._seen = self._signature()
+
+    def _append(self, ops):
+        with self._writing():
+            with open(self.journal_file, 'a') as f:
+                f.write(''.join(json.dumps(op) + '\n' for op in ops))
+                f.flush()
+                os.fsync(f.fileno())
+        self._journaled += len(ops)
+
+    def compact(self):
+        """Fold the journal into a new config.json snapshot and truncate it"""
+        if not self._journaled:
+            return
+        with self._writing():
+            # Re-read under the lock: other instances may have appended or compacted meanwhile
+            state = read_state(self.config_file, self.journal_file)
+            text = json.dumps(state, indent=2)
+            write_atomic(self.config_file, text)
+            write_atomic(self.base_file, text)
+            # A crash before this truncate only means the ops get replayed again
+            with open(self.journal_file, 'w'):
+                pass
+        self._journaled = 0
@@ -0,0 +1,120 @@
+import functools
+import json
+import math
+import os
+import time
+from collections import deque
+
+# Set to 1 to profile the Tk event handlers, or to a path to also choose where
+# the JSON report is written on exit (default: profile.json in the working directory)
+PROFILE_ENV = 'GOODDATA_INJECTOR_PROFILE'
+FRAME_BUDGET_MS = 16.7  # One frame at 60 Hz; a handler running longer than this stalls the UI
+SAMPLE_WINDOW = 1000  # Recent durations kept per handler for the percentiles
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values), max(1, math.ceil(fraction * len(sorted_values)))) - 1
+    return sorted_values[rank]
+
+
+class HandlerStats:
+    """Call count and recent durations of one handler"""
+    __slots__ = ('calls', 'over_budget', 'max_ms', 'samples')
+
+    def __init__(self):
+        self.calls = 0
+        self.over_budget = 0
+        self.max_ms = 0.0
+        self.samples = deque(maxlen=SAMPLE_WINDOW)
+
+
+class Profiler:
+    """Records how long each named handler takes, for the HUD and the JSON report.
+
+    Durations are kept in a bounded window per handler, so memory stays flat
+    however long the app runs; call and over-budget counts cover the whole run.
+    """
+
+    def __init__(self, budget_ms=FRAME_BUDGET_MS):
+        self.budget_ms = budget_ms
+        self.started = time.time()
+        self._stats = {}
+
+    def record(self, name, ms):
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = HandlerStats()
+        stats.calls += 1
+        stats.samples.append(ms)
+        if ms > stats.max_ms:
+            stats.max_ms = ms
+        if ms > self.budget_ms:
+            stats.over_budget += 1
+
+    def wrap(self, name, func):
+        """Return func timed under name"""
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(name, (time.perf_counter() - start) * 1000)
+        return timed
+
+    def snapshot(self):
+        """Return {name: {calls, p50_ms, p99_ms, max_ms, over_budget}}, slowest p99 first"""
+        report = {}
+        for name, stats in self._stats.items():
+            samples = sorted(stats.samples)
+            report[name] = {
+                'calls': stats.calls,
+                'p50_ms': round(percentile(samples, 0.50), 2),
+                'p99_ms': round(percentile(samples, 0.99), 2),
+                'max_ms': round(stats.max_ms, 2),
+                'over_budget': stats.over_budget,
+            }
+        return dict(sorted(report.items(), key=lambda entry: entry[1]['p99_ms'], reverse=True))
+
+    def dump(self, path, **extra):
+        """Write the snapshot, plus any extra fields, as JSON for comparing runs offline"""
+        report = {
+            'started': self.started,
+            'duration_s': round(time.time() - self.started, 1),
+            'budget_ms': self.budget_ms,
+            'handlers': self.snapshot(),
+            **extra,
+        }
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+def widget_census(root):
+    """Return Tk widget and Tcl command counts for root's interpreter, to spot leaks.
+
+    Widgets are counted on the Tcl side, so ones without a Python wrapper
+    (menu clones, dialog internals) are included too.
+    """
+    widgets = 0
+    pending = ['.']
+    while pending:
+        path = pending.pop()
+        widgets += 1
+        pending.extend(root.tk.splitlist(root.tk.call('winfo', 'children', path)))
+    commands = len(root.tk.splitlist(root.tk.call('info', 'commands')))
+    return {'widgets': widgets, 'tcl_commands': commands}
+
+
+_setting = os.environ.get(PROFILE_ENV, '')
+profiler = Profiler() if _setting and _setting != '0' else None
+report_path = _setting if profiler and _setting != '1' else 'profile.json'
+
+
+def profiled(name):
+    """Decorator timing a handler when profiling is on; otherwise returns it untouched"""
+    def decorate(func):
+        return profiler.wrap(name, func) if profiler else func
+    return decorate
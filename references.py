@@ -0,0 +1,289 @@
+import re
+
+
+# A raw object reference as GoodData writes it: [/gdc/md/{pid}/obj/{obj_id}]
+REFERENCE = re.compile(r'\[/gdc/md/([^/\]\s]+)/obj/(\w+)\]')
+
+
+def reference_text(pid, obj_id):
+    """Return the MAQL reference for an object in a project"""
+    return f"[/gdc/md/{pid}/obj/{obj_id}]"
+
+
+def resolve_references(text, resolve):
+    """Replace raw references in text with object names, in one pass.
+
+    resolve(pid, obj_id) returns the object's CatalogItem or None; unresolved
+    references are kept as they are. Returns the new text and a list of
+    (offset, name, pid, item) for each name put in, offsets into the new text.
+    """
+    parts = []
+    spans = []
+    pos = 0
+    length = 0  # Length of the new text so far
+    for match in REFERENCE.finditer(text):
+        pid, obj_id = match.groups()
+        item = resolve(pid, obj_id)
+        if item is None:
+            continue
+        before = text[pos:match.start()]
+        parts.append(before)
+        length += len(before)
+        spans.append((length, item.name, pid, item))
+        parts.append(item.name)
+        length += len(item.name)
+        pos = match.end()
+    parts.append(text[pos:])
+    return ''.join(parts), spans
+
+
+def line_offsets(text):
+    """Return the character offset at which each line of text starts"""
+    offsets = [0]
+    find = text.find
+    pos = find('\n')
+    while pos != -1:
+        offsets.append(pos + 1)
+        pos = find('\n', pos + 1)
+    return offsets
+
+
+def index_to_offset(offsets, index):
+    """Convert a Tk 'line.column' index into a character offset"""
+    line, column = str(index).split('.')
+    return offsets[int(line) - 1] + int(column)
+
+
+def expand_spans(text, spans):
+    """Return text with every (start, end, replacement) span replaced, in one pass.
+
+    Spans are character offsets sorted by start; a span overlapping the
+    previous one is ignored. The output is assembled with a single join.
+    """
+    parts = []
+    pos = 0
+    for start, end, replacement in spans:
+        if start < pos:
+            continue
+        parts.append(text[pos:start])
+        parts.append(replacement)
+        pos = end
+    parts.append(text[pos:])
+    return ''.join(parts)
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == '_'
+
+
+def on_word_boundaries(text, start, end):
+    """Whether text[start:end] does not run into a word on either side ("Revenue" in "Revenue2")"""
+    if start > 0 and _is_word_char(text[start - 1]) and _is_word_char(text[start]):
+        return False
+    if end < len(text) and _is_word_char(text[end]) and _is_word_char(text[end - 1]):
+        return False
+    return True
+
+
+class Reference:
+    """An object name inserted into the editor and the object it stands for"""
+    __slots__ = ('display', 'pid', 'obj_id', 'category')
+
+    def __init__(self, display, pid, obj_id, category):
+        self.display = display
+        self.pid = pid
+        self.obj_id = obj_id
+        self.category = category
+
+    def __repr__(self):
+        return f"Reference({self.display!r}, {self.pid!r}, {self.obj_id!r}, {self.category!r})"
+
+    @property
+    def text(self):
+        return reference_text(self.pid, self.obj_id)
+
+
+def locate_references(text, marks, references):
+    """Split tracked references into live and stale ones, in one pass over their marks.
+
+    marks are (mark, 'line.column' index) pairs in text order, as Tk's
+    'dump -mark' returns them; references maps mark names to References, and
+    other marks are skipped. A reference is live while the text at its mark is
+    still exactly its name, not glued to a word on either side and not
+    overlapping the previous live one. Returns [(start, end, ref)] for the live
+    references and [(mark, start, ref)] for the stale ones.
+    """
+    offsets = line_offsets(text)
+    spans = []
+    stale = []
+    for mark, index in marks:
+        ref = references.get(mark)
+        if ref is None:
+            continue
+        start = index_to_offset(offsets, index)
+        end = start + len(ref.display)
+        if (text[start:end] == ref.display and (not spans or spans[-1][1] <= start)
+                and on_word_boundaries(text, start, end)):
+            spans.append((start, end, ref))
+        else:
+            stale.append((mark, start, ref))
+    return spans, stale
+
+
+def join_references(references, source_name, target_items):
+    """Match references to the objects with the same category and name in another catalog.
+
+    A single hash join: target_items (objects with name, obj_id and category)
+    are indexed by (category, name) once, and each reference is probed once
+    with source_name(ref), its object's name in its own project. Returns
+    [(ref, target_obj_id)] for the matches and the list of unmatched references.
+    """
+    targets = {}
+    for item in target_items:
+        targets.setdefault((item.category, item.name), item.obj_id)
+    matched = []
+    unresolved = []
+    for ref in references:
+        obj_id = targets.get((ref.category, source_name(ref)))
+        if obj_id is None:
+            unresolved.append(ref)
+        else:
+            matched.append((ref, obj_id))
+    return matched, unresolved
+
+
+class Template:
+    """Text parsed once into literal chunks and object slots, for rendering into many PIDs.
+
+    Each slot stands for an object by its (category, name), since object ids
+    differ between projects. Rendering for a PID only needs that PID's ids for
+    the template's names, and assembles the output with a single join.
+    """
+
+    def __init__(self, text, slots):
+        """slots are (start, end, category, name, fallback) offsets into text, sorted by start.
+
+        fallback is what an unresolved slot renders as (usually the original reference).
+        """
+        self.chunks = []
+        self.keys = []  # Distinct (category, name) slot keys
+        self.slot_keys = []  # Index into keys for each slot
+        self.fallbacks = []
+        positions = {}
+        pos = 0
+        for start, end, category, name, fallback in slots:
+            if start < pos:
+                continue
+            self.chunks.append(text[pos:start])
+            key = (category, name)
+            if key not in positions:
+                positions[key] = len(self.keys)
+                self.keys.append(key)
+            self.slot_keys.append(positions[key])
+            self.fallbacks.append(fallback)
+            pos = end
+        self.chunks.append(text[pos:])
+
+    def __len__(self):
+        return len(self.slot_keys)
+
+    def names(self):
+        return {name for _, name in self.keys}
+
+    def render(self, pid, ids):
+        """Return the text for pid and the (category, name) keys it had no id for.
+
+        ids maps (category, name) to the object id in pid, as from
+        CatalogStore.ids_by_name; unresolved slots render as their fallback.
+        """
+        values = []
+        unresolved = []
+        for key in self.keys:
+            obj_id = ids.get(key)
+            if obj_id is None:
+                values.append(None)
+                unresolved.append(key)
+            else:
+                values.append(reference_text(pid, obj_id))
+        parts = [None] * (2 * len(self.slot_keys) + 1)
+        parts[0::2] = self.chunks
+        if unresolved:
+            parts[1::2] = [values[index] if values[index] is not None else fallback
+                           for index, fallback in zip(self.slot_keys, self.fallbacks)]
+        else:
+            parts[1::2] = list(map(values.__getitem__, self.slot_keys))
+        return ''.join(parts), unresolved
+
+
+# Quoted strings and [...] references are single tokens, so names inside them never match
+NAME_TOKEN = re.compile(r'"[^"\n]*"|\[[^\]\n]*\]|\w+|\s+|[^\w\s]')
+
+
+class NameMatcher:
+    """Finds catalog names in text, longest name first, in one left-to-right pass.
+
+    Names are split into tokens (words, runs of whitespace, single punctuation
+    characters) and stored in a token trie, so a name only matches on token
+    boundaries: "Revenue" matches in "Revenue + 1" but not in "Revenue2".
+    Building costs one tokenization per name, which keeps start-up cheap
+    even for catalogs with 100k names.
+    """
+
+    def __init__(self, names=()):
+        self._trie = {}
+        self._count = 0
+        for name, value in names:
+            self.add(name, value)
+
+    def __len__(self):
+        return self._count
+
+    def add(self, name, value):
+        """Map name to value; the first value added for a name is kept"""
+        tokens = NAME_TOKEN.findall(name)
+        if not tokens:
+            return
+        node = self._trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        if '' not in node:  # '' never is a token, so it marks the end of a name
+            node[''] = value
+            self._count += 1
+
+    def finditer(self, text):
+        """Yield (start, end, value) for each non-overlapping name in text"""
+        tokens = NAME_TOKEN.findall(text)
+        trie = self._trie
+        count = len(tokens)
+        pos = 0  # Character offset of tokens[i]
+        i = 0
+        while i < count:
+            node = trie.get(tokens[i])
+            if node is None:
+                pos += len(tokens[i])
+                i += 1
+                continue
+            match = None
+            j = i + 1
+            end = pos + len(tokens[i])
+            while True:
+                if '' in node:
+                    match = (j, end, node[''])
+                if j == count:
+                    break
+                node = node.get(tokens[j])
+                if node is None:
+                    break
+                end += len(tokens[j])
+                j += 1
+            if match is None:
+                pos += len(tokens[i])
+                i += 1
+                continue
+            i, end, value = match
+            yield pos, end, value
+            pos = end
+
+    def sub(self, text):
+        """Return text with every name replaced by its value"""
+        return expand_spans(text, self.finditer(text))
@@ -0,0 +1,246 @@
+import heapq
+import itertools
+import re
+
+
+_WORD = re.compile(r'\w+')
+
+# Match quality of a query word against a name word
+EXACT, PREFIX, SUBSTRING, SUBSEQUENCE = 4, 3, 2, 1
+LEVELS = (EXACT, PREFIX, SUBSTRING, SUBSEQUENCE)
+FIRST_WORD_BONUS = 2  # Names whose first word starts with the first query word
+LENGTH_TIER = 4  # Characters per length tier used to order names within a score
+MIN_QUERY = 2  # Shorter queries match too much of the catalog to be useful
+
+
+def normalize(name):
+    """Return the case-folded word tokens of a name"""
+    return tuple(_WORD.findall(name.casefold()))
+
+
+def word_grams(word):
+    """Return the vocabulary index grams of a word: anchored starts, bigrams and trigrams"""
+    grams = {'\x00' + word[:1], '\x00' + word[:2]}
+    for size in (2, 3):
+        for pos in range(len(word) - size + 1):
+            grams.add(word[pos:pos + size])
+    return grams
+
+
+def is_subsequence(needle, haystack):
+    chars = iter(haystack)
+    return all(char in chars for char in needle)
+
+
+def match_quality(query_word, word):
+    if word == query_word:
+        return EXACT
+    if word.startswith(query_word):
+        return PREFIX
+    if len(query_word) > 1 and query_word in word:
+        return SUBSTRING
+    if len(query_word) > 2 and is_subsequence(query_word, word):
+        return SUBSEQUENCE
+    return 0
+
+
+class FuzzyIndex:
+    """Ranked, token-aware fuzzy matcher over pre-normalized names.
+
+    A name matches when every query word is equal to, a prefix of, contained in
+    or an abbreviation of one of its words (a subsequence starting with the
+    same letter), in any order ("rev net" finds "Net Revenue", "tot rvn" finds
+    "Total Revenue"). A name scores the sum of each query word's best match quality,
+    plus a bonus when its first word starts with the first query word; ties go
+    to shorter names.
+
+    Matching happens at the vocabulary level: a gram index over the distinct
+    words finds the words each query word matches (with trigram T-occurrence,
+    so "revnue" still reaches "revenue", and a scan of the words sharing its
+    first letter for abbreviations like "rvn"), and names are only ever
+    handled as sets. Score classes are enumerated best-first with C-level set algebra, and
+    only the final, partially-used class is ordered by length with a heap, so
+    the cost per query is independent of how many names match.
+    """
+
+    def __init__(self, entries=()):
+        self.rebuild(entries)
+
+    def __len__(self):
+        return len(self._names)
+
+    def rebuild(self, entries):
+        """Replace the index contents with (name, obj_id) pairs"""
+        self._names = {}  # obj_id -> (folded_name, words)
+        self._word_ids = {}  # word -> set of obj_ids whose name contains it
+        self._first_word_ids = {}  # word -> set of obj_ids whose name starts with it
+        self._word_grams = {}  # gram -> set of vocabulary words
+        self._tiers = []  # Length tier -> set of obj_ids
+        self._word_cache = {}  # query word -> {quality: [words]}
+        for name, obj_id in entries:
+            self.add(name, obj_id)
+
+    def add(self, name, obj_id):
+        if obj_id in self._names:
+            self.remove(obj_id)
+        words = normalize(name)
+        folded_name = ' '.join(words)
+        self._names[obj_id] = (folded_name, words)
+        for word in set(words):
+            ids = self._word_ids.get(word)
+            if ids is None:
+                self._word_ids[word] = {obj_id}
+                for gram in word_grams(word):
+                    self._word_grams.setdefault(gram, set()).add(word)
+                self._word_cache.clear()
+            else:
+                ids.add(obj_id)
+        if words:
+            self._first_word_ids.setdefault(words[0], set()).add(obj_id)
+        tier = len(folded_name) // LENGTH_TIER
+        while len(self._tiers) <= tier:
+            self._tiers.append(set())
+        self._tiers[tier].add(obj_id)
+
+    def remove(self, obj_id):
+        entry = self._names.pop(obj_id, None)
+        if entry is None:
+            return
+        folded_name, words = entry
+        for word in set(words):
+            ids = self._word_ids[word]
+            ids.discard(obj_id)
+            if not ids:
+                del self._word_ids[word]
+                for gram in word_grams(word):
+                    vocabulary = self._word_grams[gram]
+                    vocabulary.discard(word)
+                    if not vocabulary:
+                        del self._word_grams[gram]
+                self._word_cache.clear()
+        if words:
+            first = self._first_word_ids[words[0]]
+            first.discard(obj_id)
+            if not first:
+                del self._first_word_ids[words[0]]
+        self._tiers[len(folded_name) // LENGTH_TIER].discard(obj_id)
+
+    def _matching_words(self, query_word):
+        """Return {quality: [vocabulary words]} for one query word"""
+        cached = self._word_cache.get(query_word)
+        if cached is not None:
+            return cached
+
+        grams = self._word_grams
+        if len(query_word) < 3:
+            candidates = set(grams.get('\x00' + query_word, ()))
+            if len(query_word) == 2:
+                candidates |= grams.get(query_word, set())
+        else:
+            # Words sharing at least half of the query's trigrams
+            trigrams = {query_word[pos:pos + 3] for pos in range(len(query_word) - 2)}
+            need = (len(trigrams) + 1) // 2
+            counts = {}
+            for gram in trigrams:
+                for word in grams.get(gram, ()):
+                    counts[word] = counts.get(word, 0) + 1
+            candidates = {word for word, count in counts.items() if count >= need}
+            candidates |= grams.get('\x00' + query_word[:2], set())
+            # Abbreviations ("rvn", "cstmr") share too few grams; scan the words with the same first letter
+            candidates.update(word for word in grams.get('\x00' + query_word[0], ())
+                              if word not in candidates and is_subsequence(query_word, word))
+
+        by_quality = {}
+        for word in candidates:
+            quality = match_quality(query_word, word)
+            if quality:
+                by_quality.setdefault(quality, []).append(word)
+        self._word_cache[query_word] = by_quality
+        return by_quality
+
+    def _shortest(self, ids, count):
+        """Return up to count ids ordered by (name length, name), using the length tiers"""
+        if len(ids) > count * 4:
+            picked = []
+            for tier in self._tiers:
+                picked.extend(ids & tier if len(tier) > len(ids) else tier & ids)
+                if len(picked) >= count:
+                    break
+            ids = picked
+        names = self._names
+        return heapq.nsmallest(count, ids, key=lambda obj_id: (len(names[obj_id][0]), names[obj_id][0]))
+
+    def search(self, query, k=20):
+        """Return the ids of the k best matches for query, best first"""
+        query_words = normalize(query)
+        if len(''.join(query_words)) < MIN_QUERY:
+            return []
+        matches = [self._matching_words(word) for word in query_words]
+        if not all(matches):
+            return []
+
+        # Restrict every set operation to the names the most selective query word matches
+        word_ids = self._word_ids
+        universe = None
+        if len(matches) > 1:
+            sizes = [sum(len(word_ids[word]) for words in match.values() for word in words)
+                     for match in matches]
+            driver = matches[sizes.index(min(sizes))]
+            universe = set().union(*(word_ids[word] for words in driver.values() for word in words))
+        per_word = [_BestQualitySets(word_ids, match, universe) for match in matches]
+
+        bonus_words = matches[0].get(EXACT, []) + matches[0].get(PREFIX, [])
+        bonus = set().union(*(_restrict(self._first_word_ids.get(word, set()), universe)
+                              for word in bonus_words))
+
+        # Every (quality per query word, bonus) combination is a score class
+        classes = []
+        for combo in itertools.product(*(sets.qualities for sets in per_word)):
+            for has_bonus in (True, False):
+                classes.append((sum(combo) + FIRST_WORD_BONUS * has_bonus, combo, has_bonus))
+        classes.sort(key=lambda entry: entry[0], reverse=True)
+
+        results = []
+        for _, combo, has_bonus in classes:
+            sets = sorted((per_word[pos].get(quality) for pos, quality in enumerate(combo)), key=len)
+            if not sets[0]:
+                continue
+            ids = sets[0].intersection(*sets[1:])
+            ids = ids & bonus if has_bonus else ids - bonus
+            if ids:
+                results.extend(self._shortest(ids, k - len(results)))
+                if len(results) >= k:
+                    break
+        return results
+
+
+def _restrict(ids, universe):
+    if universe is None:
+        return ids
+    return ids & universe if len(ids) < len(universe) else universe & ids
+
+
+class _BestQualitySets:
+    """Lazily built {quality: ids} for one query word, each id under its best quality only"""
+    __slots__ = ('qualities', '_word_ids', '_words', '_universe', '_sets', '_seen')
+
+    def __init__(self, word_ids, words_by_quality, universe=None):
+        self.qualities = sorted(words_by_quality, reverse=True)
+        self._word_ids = word_ids
+        self._words = words_by_quality
+        self._universe = universe
+        self._sets = {}
+        self._seen = set()
+
+    def get(self, quality):
+        # Lower qualities exclude every id already matched at a higher one
+        for level in self.qualities:
+            if level < quality:
+                break
+            if level not in self._sets:
+                ids = set().union(*(_restrict(self._word_ids[word], self._universe)
+                                    for word in self._words[level]))
+                ids -= self._seen
+                self._seen |= ids
+                self._sets[level] = ids
+        return self._sets.get(quality, set())
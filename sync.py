@@ -0,0 +1,217 @@
+import http.client
+import json
+import os
+import queue
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlencode, urlsplit
+
+from importer import classify
+
+API_URL = os.environ.get('GOODDATA_URL', 'https://secure.gooddata.com')
+SYNC_CATEGORIES = ('metric', 'attribute')  # Date attributes come with 'attribute'
+PAGE_SIZE = 50  # The most objects/query returns per request
+WORKERS = 4
+
+
+def auth_headers():
+    """Headers that authenticate API requests, from GOODDATA_TT / GOODDATA_SST"""
+    headers = {}
+    if os.environ.get('GOODDATA_TT'):
+        headers['X-GDC-AuthTT'] = os.environ['GOODDATA_TT']
+    if os.environ.get('GOODDATA_SST'):
+        headers['Cookie'] = f"GDCAuthSST={os.environ['GOODDATA_SST']}"
+    return headers
+
+
+class SyncError(Exception):
+    pass
+
+
+class ConnectionPool:
+    """Keep-alive HTTP(S) connections to one host, shared by worker threads.
+
+    Each request borrows an idle connection (or opens one, up to size) and
+    returns it afterwards, so a sync reuses a handful of TCP/TLS sessions for
+    all of its pages.
+    """
+
+    def __init__(self, base_url, size=WORKERS, timeout=30, headers=None):
+        parts = urlsplit(base_url)
+        self.connection_class = (http.client.HTTPSConnection if parts.scheme == 'https'
+                                 else http.client.HTTPConnection)
+        self.host = parts.hostname
+        self.port = parts.port
+        self.timeout = timeout
+        self.headers = {'Accept': 'application/json', **(headers or {})}
+        self._idle = queue.LifoQueue()
+        self._slots = queue.Queue()
+        for _ in range(size):
+            self._slots.put(None)
+
+    def _connect(self):
+        return self.connection_class(self.host, self.port, timeout=self.timeout)
+
+    def request(self, path, headers=None):
+        """GET path and return (status, headers with lower-case names, body)"""
+        self._slots.get()  # Bounds the number of open connections
+        try:
+            try:
+                conn, reused = self._idle.get_nowait(), True
+            except queue.Empty:
+                conn, reused = self._connect(), False
+            try:
+                response = self._send(conn, path, headers)
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                if not reused:
+                    raise
+                # The server dropped an idle keep-alive connection; retry on a fresh one
+                conn = self._connect()
+                response = self._send(conn, path, headers)
+            if response[1].get('connection', '').lower() == 'close':
+                conn.close()
+            else:
+                self._idle.put(conn)
+            return response
+        finally:
+            self._slots.put(None)
+
+    def _send(self, conn, path, headers):
+        conn.request('GET', path, headers={**self.headers, **(headers or {})})
+        response = conn.getresponse()
+        body = response.read()
+        return response.status, {name.lower(): value for name, value in response.getheaders()}, body
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class CatalogSync:
+    """Pulls a PID's metrics and attributes from the metadata API into a CatalogStore.
+
+    Pages of /gdc/md/{pid}/objects/query are fetched by a bounded thread pool,
+    running ahead of the last full page, over a keep-alive connection pool.
+    Every page is requested with the ETag and Last-Modified of the previous
+    sync, so unchanged pages come back as empty 304s and only changed pages
+    are parsed and written. Items an earlier sync delivered that the API no
+    longer returns are removed; items added by hand are left alone.
+    """
+
+    def __init__(self, store, base_url=API_URL, headers=None, workers=WORKERS, page_size=PAGE_SIZE):
+        self.store = store
+        self.base_url = base_url
+        self.headers = auth_headers() if headers is None else headers
+        self.workers = workers
+        self.page_size = page_size
+
+    def page_url(self, pid, category, offset):
+        query = urlencode({'category': category, 'limit': self.page_size, 'offset': offset})
+        return f"/gdc/md/{pid}/objects/query?{query}"
+
+    def sync(self, pid, progress=None):
+        """Sync one PID and return {'entries', 'removed', 'fetched', 'not_modified'}.
+
+        entries are the (category, obj_id, name) tuples from changed pages and
+        removed the ids that disappeared; both have been written to the store.
+        progress(pages_done) is called from the calling thread as pages arrive.
+        """
+        previous = self.store.sync_pages(pid)
+        pool = ConnectionPool(self.base_url, self.workers, headers=self.headers)
+        try:
+            pages = self._fetch_all(pid, previous, pool, progress)
+        finally:
+            pool.close()
+
+        entries = {}
+        fetched = not_modified = 0
+        stored_pages = {}
+        for url, (status, etag, last_modified, count, ids, page_entries) in pages.items():
+            if status == 304:
+                not_modified += 1
+            else:
+                fetched += 1
+                for entry in page_entries:
+                    entries.setdefault(entry[1], entry)
+            stored_pages[url] = (etag, last_modified, count, ids)
+
+        current_ids = {obj_id for page in stored_pages.values() for obj_id in page[3]}
+        previous_ids = {obj_id for page in previous.values() for obj_id in page[3]}
+        removed = sorted(previous_ids - current_ids)
+        entries = list(entries.values())
+        self.store.apply_sync(pid, entries, removed, stored_pages)
+        return {'entries': entries, 'removed': removed,
+                'fetched': fetched, 'not_modified': not_modified}
+
+    def _fetch_all(self, pid, previous, pool, progress):
+        """Fetch every page of every category with at most self.workers requests in flight"""
+        next_offset = {category: 0 for category in SYNC_CATEGORIES}
+        last_offset = {}  # category -> offset of its last (short) page
+        pages = {}
+        in_flight = {}
+
+        def submit(executor):
+            # Round-robin over the categories that may still have pages
+            open_categories = [c for c in SYNC_CATEGORIES if c not in last_offset]
+            if not open_categories:
+                return False
+            category = min(open_categories, key=lambda c: next_offset[c])
+            offset = next_offset[category]
+            next_offset[category] += self.page_size
+            url = self.page_url(pid, category, offset)
+            future = executor.submit(self._fetch_page, pool, url, previous.get(url))
+            in_flight[future] = (category, offset, url)
+            return True
+
+        with ThreadPoolExecutor(self.workers, thread_name_prefix='gooddata-sync') as executor:
+            try:
+                while len(in_flight) < self.workers and submit(executor):
+                    pass
+                while in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        category, offset, url = in_flight.pop(future)
+                        page = future.result()
+                        if category in last_offset and offset > last_offset[category]:
+                            continue  # Speculative request past the end
+                        if page[3] < self.page_size:
+                            last_offset[category] = offset
+                            # Drop pages fetched past the end before the short page arrived
+                            for other in [u for u, p in pages.items() if p[6] == category and p[7] > offset]:
+                                del pages[other]
+                        pages[url] = page + (category, offset)
+                        if progress is not None:
+                            progress(len(pages))
+                    while len(in_flight) < self.workers and submit(executor):
+                        pass
+            except BaseException:
+                for future in in_flight:
+                    future.cancel()
+                raise
+        return {url: page[:6] for url, page in pages.items()}
+
+    def _fetch_page(self, pool, url, cached):
+        """Return (status, etag, last_modified, count, ids, entries) for one page"""
+        headers = {}
+        if cached is not None:
+            etag, last_modified = cached[0], cached[1]
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        status, response_headers, body = pool.request(url, headers)
+        if status == 304 and cached is not None:
+            return (304, cached[0], cached[1], cached[2], cached[3], [])
+        if status != 200:
+            raise SyncError(f"GET {url} returned HTTP {status}")
+        try:
+            objects = json.loads(body)['objects']
+        except (ValueError, KeyError, TypeError):
+            raise SyncError(f"GET {url} returned an unexpected response") from None
+        items = objects.get('items', [])
+        entries = [entry for entry in map(classify, items) if entry is not None]
+        return (200, response_headers.get('etag'), response_headers.get('last-modified'),
+                len(items), [entry[1] for entry in entries], entries)
@@ -0,0 +1,78 @@
+"""Catalog lookups, index upkeep and change events."""
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from catalog import Catalog  # noqa: E402
+
+
+class CatalogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.catalog = Catalog({
+            'metrics': [{'name': 'Revenue', 'id': 1}, {'name': 'Cost', 'id': '2'},
+                        {'name': 'Duplicate', 'id': '1'}],
+            'attributes': [{'name': 'Region', 'id': '3'}],
+        }, pid='P')
+        self.events = []
+        self.catalog.subscribe(lambda event, item, previous: self.events.append(
+            (event, item and item.obj_id, previous and (previous.name, previous.obj_id))))
+
+    def test_load(self):
+        self.assertEqual(len(self.catalog), 3)
+        self.assertEqual(self.catalog.get('1').name, 'Revenue')  # First of a duplicated id wins
+        self.assertEqual([item.name for item in self.catalog.items('metrics')], ['Revenue', 'Cost'])
+        self.assertEqual(self.catalog.find_by_name('Region').obj_id, '3')
+        self.assertIsNone(self.catalog.find_by_name('Duplicate'))
+
+    def test_add_existing_id_updates(self):
+        self.catalog.add('Profit', 4, 'metrics')
+        item = self.catalog.add('Region Name', '3', 'attributes')
+        self.assertIs(item, self.catalog.get('3'))
+        self.assertIsNone(self.catalog.find_by_name('Region'))
+        self.assertEqual(self.events, [('add', '4', None), ('update', '3', ('Region', '3'))])
+
+    def test_update_moves_indexes(self):
+        item = self.catalog.get('2')
+        self.catalog.update(item, obj_id='20', category='dates')
+        self.assertIsNone(self.catalog.get('2'))
+        self.assertIs(self.catalog.get('20'), item)
+        self.assertEqual(self.catalog.items('dates'), [item])
+        self.assertEqual([i.obj_id for i in self.catalog.suggest('cost')], ['20'])
+
+    def test_update_onto_another_id_replaces_it(self):
+        self.catalog.update(self.catalog.get('2'), obj_id='1')
+        self.assertEqual(len(self.catalog), 2)
+        self.assertEqual(self.catalog.get('1').name, 'Cost')
+        self.assertEqual(self.catalog.suggest('revenue'), [])
+        self.assertEqual(self.events, [('remove', '1', None), ('update', '1', ('Cost', '2'))])
+
+    def test_remove(self):
+        self.catalog.remove(self.catalog.get('1'))
+        self.assertNotIn('1', self.catalog)
+        self.assertIsNone(self.catalog.find_by_name('Revenue'))
+        self.assertEqual(self.catalog.suggest('revenue'), [])
+
+    def test_batches_notify_once(self):
+        metrics = self.catalog.items('metrics')
+        self.catalog.add_many([('metrics', 5, 'Margin'), ('metrics', '1', 'Net Revenue')])
+        self.catalog.remove_many(['2', 'unknown'])
+        self.catalog.remove_many(['unknown'])
+        self.assertEqual(self.events, [('batch', None, None), ('batch', None, None)])
+        self.assertIs(self.catalog.items('metrics'), metrics)  # Panels keep the live list
+        self.assertEqual([item.name for item in metrics], ['Net Revenue', 'Margin'])
+        self.assertEqual(self.catalog.find_by_name('Net Revenue').obj_id, '1')
+
+    def test_adopt_and_state(self):
+        other = Catalog({'dates': [{'name': 'Day', 'id': '7'}]}, pid='Q')
+        self.catalog.adopt(other)
+        self.assertEqual((self.catalog.pid, len(self.catalog)), ('Q', 1))
+        self.assertEqual(self.catalog.to_state(),
+                         {'metrics': [], 'attributes': [], 'dates': [{'name': 'Day', 'id': '7'}]})
+        self.assertEqual(self.events, [('reset', None, None)])
+
+
+if __name__ == '__main__':
+    unittest.main()
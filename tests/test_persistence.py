@@ -0,0 +1,261 @@
+"""Journal replay, ConfigStore writes and merging config.json changes between writers."""
+import json
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from catalog import Catalog, CatalogItem  # noqa: E402
+from persistence import ConfigStore, apply_ops, merge_items, read_journal, read_state  # noqa: E402
+
+
+def settle(store, timeout=5):
+    """Wait until the store's writer thread has written everything queued"""
+    deadline = time.monotonic() + timeout
+    while store.unwritten():
+        if time.monotonic() > deadline:
+            raise AssertionError("config writer did not finish")
+        time.sleep(0.01)
+
+
+def names(state):
+    return {entry['id']: entry['name'] for entries in (state.get('metrics', []),
+                                                       state.get('attributes', []),
+                                                       state.get('dates', []))
+            for entry in entries}
+
+
+class ApplyOpsTest(unittest.TestCase):
+
+    def test_replay(self):
+        state = {'items_pid': 'P', 'metrics': [{'name': 'Revenue', 'id': '1'}]}
+        ops = [
+            {'op': 'put', 'pid': 'P', 'category': 'attributes', 'name': 'Region', 'id': '2'},
+            {'op': 'put', 'pid': 'P', 'category': 'metrics', 'name': 'Net Revenue', 'id': '1'},
+            {'op': 'remove', 'pid': 'P', 'id': '2'},
+            {'op': 'pids', 'current_pid': 'P', 'saved_pids': ['P', 'Q']},
+        ]
+        result = apply_ops(state, ops)
+        self.assertEqual(result['metrics'], [{'name': 'Net Revenue', 'id': '1'}])
+        self.assertEqual(result['attributes'], [])
+        self.assertEqual(result['saved_pids'], ['P', 'Q'])
+        self.assertEqual(apply_ops(result, ops), result)  # Replaying again is harmless
+
+    def test_item_ops_of_other_pids_are_skipped(self):
+        ops = [
+            {'op': 'reset', 'pid': 'Q', 'metrics': [{'name': 'Cost', 'id': '9'}]},
+            {'op': 'put', 'pid': 'P', 'category': 'metrics', 'name': 'Revenue', 'id': '1'},
+            {'op': 'remove', 'pid': 'P', 'id': '9'},
+        ]
+        result = apply_ops({'items_pid': 'P'}, ops)
+        self.assertEqual(result['items_pid'], 'Q')
+        self.assertEqual(names(result), {'9': 'Cost'})
+
+    def test_removed_ids_are_reported(self):
+        ops = [
+            {'op': 'remove', 'pid': 'P', 'id': '1'},
+            {'op': 'remove', 'pid': 'P', 'id': '2'},
+            {'op': 'put', 'pid': 'P', 'category': 'metrics', 'name': 'Back', 'id': '2'},
+        ]
+        removed = set()
+        apply_ops({'items_pid': 'P'}, ops, removed)
+        self.assertEqual(removed, {'1'})
+
+    def test_legacy_config_replay(self):
+        # Written before ops carried a PID and config.json recorded the mirrored one
+        state = {'current_pid': 'P', 'saved_pids': ['P'], 'metrics': [{'name': 'Revenue', 'id': '1'}]}
+        ops = [{'op': 'put', 'category': 'dates', 'name': 'Day', 'id': '3'},
+               {'op': 'remove', 'id': '1'}]
+        result = apply_ops(state, ops)
+        self.assertEqual(names(result), {'3': 'Day'})
+        self.assertEqual(result['current_pid'], 'P')
+        self.assertNotIn('items_pid', result)
+
+        # New ops wait for a reset to say which PID the items are
+        put = {'op': 'put', 'pid': 'P', 'category': 'metrics', 'name': 'Cost', 'id': '4'}
+        self.assertEqual(names(apply_ops(result, [put])), {'3': 'Day'})
+        reset = {'op': 'reset', 'pid': 'P', 'dates': [{'name': 'Day', 'id': '3'}]}
+        self.assertEqual(names(apply_ops(result, [reset, put])), {'3': 'Day', '4': 'Cost'})
+
+
+class ReadJournalTest(unittest.TestCase):
+
+    def test_torn_last_line_is_ignored(self):
+        with tempfile.TemporaryDirectory() as workdir:
+            journal = Path(workdir) / 'config.journal'
+            journal.write_text('{"op": "remove", "id": "1"}\n{"op": "put", "id": "2", "na')
+            self.assertEqual(read_journal(journal), [{'op': 'remove', 'id': '1'}])
+            self.assertEqual(read_journal(Path(workdir) / 'missing.journal'), [])
+
+
+class ConfigStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        self.dir = Path(workdir.name)
+        self.config_file = self.dir / 'config.json'
+        self.journal_file = self.dir / 'config.journal'
+
+    def store(self, **kwargs):
+        store = ConfigStore(self.config_file, self.journal_file, **kwargs)
+        self.addCleanup(store.close)
+        return store
+
+    def test_pending_ops_coalesce(self):
+        store = self.store(delay=60)
+        store.record({'op': 'put', 'pid': 'P', 'category': 'metrics', 'name': 'A', 'id': '1'})
+        store.record({'op': 'put', 'pid': 'P', 'category': 'metrics', 'name': 'B', 'id': '1'})
+        store.record({'op': 'put', 'pid': 'P', 'category': 'metrics', 'name': 'C', 'id': '2'})
+        store.record({'op': 'remove', 'pid': 'P', 'id': '2'})
+        store.record({'op': 'pids', 'current_pid': 'P', 'saved_pids': ['P']})
+        self.assertEqual([(op['op'], op.get('name')) for op in store.unwritten()],
+                         [('put', 'B'), ('remove', None), ('pids', None)])
+
+        # A reset supersedes every queued item op, but not the PID selection
+        store.replace_items('P', {'metrics': [{'name': 'D', 'id': '3'}]})
+        self.assertEqual([op['op'] for op in store.unwritten()], ['pids', 'reset'])
+
+        store.close()
+        state = json.loads(self.config_file.read_text())
+        self.assertEqual((state['items_pid'], names(state)), ('P', {'3': 'D'}))
+        self.assertEqual(read_journal(self.journal_file), [])
+
+    def test_journal_is_compacted(self):
+        store = self.store(delay=0, compact_every=3)
+        catalog = Catalog(pid='P')
+        catalog.subscribe(lambda event, item, previous:
+                          store.on_catalog_change(catalog.pid, event, item, previous))
+        store.replace_items('P', catalog.to_state())
+        settle(store)
+        for number in range(3):
+            catalog.add(f'Metric {number}', number, 'metrics')
+            settle(store)
+        self.assertEqual(read_journal(self.journal_file), [])
+        self.assertEqual(len(names(json.loads(self.config_file.read_text()))), 3)
+
+        catalog.add('Metric 3', 3, 'metrics')
+        settle(store)
+        self.assertEqual(len(read_journal(self.journal_file)), 1)
+        self.assertEqual(len(names(read_state(self.config_file, self.journal_file))), 4)
+
+    def test_own_writes_are_not_external(self):
+        store = self.store(delay=0)
+        store.load()
+        store.replace_items('P', {'metrics': [{'name': 'A', 'id': '1'}]})
+        settle(store)
+        self.assertFalse(store.changed_externally())
+        other = self.store(delay=0)
+        other.record({'op': 'pids', 'current_pid': 'P', 'saved_pids': ['P']})
+        settle(other)
+        self.assertTrue(store.changed_externally())
+
+
+class MergeTest(unittest.TestCase):
+    """Two instances sharing config.json: each merges what the other changed"""
+
+    def setUp(self):
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        config_file, journal_file = Path(workdir.name) / 'config.json', Path(workdir.name) / 'config.journal'
+        self.ours = ConfigStore(config_file, journal_file, delay=0)
+        self.theirs = ConfigStore(config_file, journal_file, delay=0)
+        self.addCleanup(self.ours.close)
+        self.addCleanup(self.theirs.close)
+
+        self.catalog = Catalog({'metrics': [{'name': 'Revenue', 'id': '1'}]}, pid='P')
+        self.catalog.subscribe(lambda event, item, previous:
+                               self.ours.on_catalog_change(self.catalog.pid, event, item, previous))
+        self.ours.replace_items('P', self.catalog.to_state())
+        settle(self.ours)
+        self.ours.load()
+        self.theirs.load()
+
+    def merge(self, keep=()):
+        """What apply_external_config does with a reload"""
+        state, removed = self.ours.reload()
+        base, self.ours.mirror = self.ours.mirror, state
+        return merge_items(base, state, self.catalog, removed, keep)
+
+    def test_stale_reset_keeps_our_edits(self):
+        stale = self.catalog.to_state()
+        self.catalog.add('Cost', '2', 'metrics')
+        self.catalog.update(self.catalog.get('1'), name='Net Revenue')
+        settle(self.ours)
+        self.theirs.replace_items('P', stale)  # e.g. at the end of their import
+        settle(self.theirs)
+        self.assertEqual(self.merge(), ([], []))
+
+    def test_their_edits_are_applied(self):
+        self.theirs.on_catalog_change('P', 'add', CatalogItem('Cost', '2', 'metrics'))
+        self.theirs.on_catalog_change('P', 'update', CatalogItem('Net Revenue', '1', 'metrics'),
+                                      CatalogItem('Revenue', '1', 'metrics'))
+        settle(self.theirs)
+        puts, removed = self.merge()
+        self.assertEqual(sorted(puts), [('metrics', '1', 'Net Revenue'), ('metrics', '2', 'Cost')])
+        self.assertEqual(removed, [])
+
+        self.theirs.on_catalog_change('P', 'remove', CatalogItem('Cost', '2', 'metrics'))
+        settle(self.theirs)
+        self.catalog.add_many([('metrics', '2', 'Cost')])
+        self.assertEqual(self.merge(), ([], ['2']))
+
+    def test_our_unwritten_edits_win(self):
+        self.theirs.on_catalog_change('P', 'update', CatalogItem('Gross Revenue', '1', 'metrics'),
+                                      CatalogItem('Revenue', '1', 'metrics'))
+        settle(self.theirs)
+        self.assertEqual(self.merge(keep={'1'}), ([], []))
+
+    def test_reset_to_another_pid_is_not_merged(self):
+        self.theirs.replace_items('Q', {'metrics': [{'name': 'Other', 'id': '9'}]})
+        self.theirs.on_catalog_change('Q', 'remove', CatalogItem('Other', '9', 'metrics'))
+        settle(self.theirs)
+        state, removed = self.ours.reload()
+        self.assertEqual(state['items_pid'], 'Q')  # apply_external_config stops here for P
+
+
+class OutsideEditsTest(unittest.TestCase):
+    """config.json edited while the app was closed"""
+
+    def setUp(self):
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        self.config_file = Path(workdir.name) / 'config.json'
+        self.journal_file = Path(workdir.name) / 'config.journal'
+        store = ConfigStore(self.config_file, self.journal_file, delay=0)
+        store.replace_items('P', {'metrics': [{'name': 'Revenue', 'id': '1'},
+                                              {'name': 'Cost', 'id': '2'}]})
+        store.close()
+
+    def reopen(self):
+        store = ConfigStore(self.config_file, self.journal_file)
+        self.addCleanup(store.close)
+        return store
+
+    def test_unedited(self):
+        self.assertIsNone(self.reopen().outside_edits())
+
+    def test_lagging_snapshot_removes_nothing(self):
+        # The app crashed with ops still in the journal, behind what SQLite has
+        with open(self.journal_file, 'a') as f:
+            f.write(json.dumps({'op': 'remove', 'pid': 'P', 'id': '2'}) + '\n')
+        self.assertIsNone(self.reopen().outside_edits())
+
+    def test_script_edits_are_merged(self):
+        state = json.loads(self.config_file.read_text())
+        state['metrics'] = [{'name': 'Net Revenue', 'id': '1'}, {'name': 'Margin', 'id': '3'}]
+        self.config_file.write_text(json.dumps(state))
+
+        base, snapshot, removed = self.reopen().outside_edits()
+        stored = Catalog({'metrics': [{'name': 'Revenue', 'id': '1'}, {'name': 'Cost', 'id': '2'},
+                                      {'name': 'Only in SQLite', 'id': '4'}]}, pid='P')
+        puts, removed = merge_items(base, snapshot, stored, removed)
+        self.assertEqual(sorted(puts), [('metrics', '1', 'Net Revenue'), ('metrics', '3', 'Margin')])
+        self.assertEqual(removed, ['2'])
+
+
+if __name__ == '__main__':
+    unittest.main()
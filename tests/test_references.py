@@ -0,0 +1,45 @@
+"""Finding catalog names and raw references in MAQL text."""
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from catalog import CatalogItem  # noqa: E402
+from references import NameMatcher, expand_spans, reference_text, resolve_references  # noqa: E402
+
+
+class NameMatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.matcher = NameMatcher([('Revenue', 'R'), ('Net Revenue', 'N'), ('Revenue', 'ignored'),
+                                    ('Cost (USD)', 'C')])
+
+    def test_longest_name_wins(self):
+        text = 'SELECT Net Revenue - Revenue'
+        self.assertEqual([(text[start:end], value) for start, end, value in self.matcher.finditer(text)],
+                         [('Net Revenue', 'N'), ('Revenue', 'R')])
+        self.assertEqual(len(self.matcher), 3)  # The first value added for a name is kept
+
+    def test_token_boundaries(self):
+        self.assertEqual(list(self.matcher.finditer('Revenue2 NetRevenue "Revenue"')), [])
+        self.assertEqual(self.matcher.sub('(Cost (USD))/Revenue'), '(C)/R')
+
+    def test_net_without_revenue_falls_back(self):
+        self.assertEqual(self.matcher.sub('Net Cost (USD), Net Revenue'), 'Net C, N')
+
+
+class ResolveReferencesTest(unittest.TestCase):
+
+    def test_known_references_become_names(self):
+        revenue = CatalogItem('Revenue', '1', 'metrics')
+        catalog = {('P', '1'): revenue}
+        text = f"SELECT {reference_text('P', '1')} + {reference_text('P', '2')}"
+        shown, spans = resolve_references(text, lambda pid, obj_id: catalog.get((pid, obj_id)))
+        self.assertEqual(shown, f"SELECT Revenue + {reference_text('P', '2')}")
+        self.assertEqual(spans, [(7, 'Revenue', 'P', revenue)])
+        self.assertEqual(expand_spans(shown, [(7, 14, reference_text('P', '1'))]), text)
+
+
+if __name__ == '__main__':
+    unittest.main()
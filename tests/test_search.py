@@ -0,0 +1,50 @@
+"""FuzzyIndex matching and ranking."""
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from search import FuzzyIndex  # noqa: E402
+
+NAMES = {
+    '1': 'Revenue',
+    '2': 'Net Revenue',
+    '3': 'Total Revenue per Customer',
+    '4': 'Revenue Growth',
+    '5': 'Customer Count',
+    '6': 'Previous Value',
+}
+
+
+class FuzzyIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = FuzzyIndex((name, obj_id) for obj_id, name in NAMES.items())
+
+    def test_exact_and_first_word_rank_first(self):
+        self.assertEqual(self.index.search('revenue', 3), ['1', '4', '2'])
+
+    def test_words_in_any_order(self):
+        self.assertEqual(self.index.search('rev net'), ['2'])
+        self.assertEqual(self.index.search('customer total'), ['3'])
+
+    def test_substring_typo_and_abbreviation(self):
+        self.assertEqual(self.index.search('venue', 1), ['1'])
+        self.assertIn('1', self.index.search('revnue'))
+        self.assertEqual(self.index.search('cstmr cnt'), ['5'])
+        self.assertEqual(self.index.search('tot rvn'), ['3'])
+
+    def test_short_and_unmatched_queries(self):
+        self.assertEqual(self.index.search('r'), [])
+        self.assertEqual(self.index.search('revenue zzz'), [])
+
+    def test_add_and_remove(self):
+        self.index.remove('1')
+        self.index.add('Revenue Target', '7')
+        self.assertEqual(self.index.search('revenue', 2), ['4', '7'])
+        self.assertEqual(len(self.index), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+"""CatalogSync against a local stub of the GoodData objects/query API.
+
+    python -m unittest discover tests
+"""
+import hashlib
+import json
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from catalog_store import CatalogStore  # noqa: E402
+from sync import CatalogSync  # noqa: E402
+
+PID = 'stubpid'
+
+
+class StubAPI(BaseHTTPRequestHandler):
+    """Serves /gdc/md/{pid}/objects/query pages from `objects`, with ETags and 304s"""
+    protocol_version = 'HTTP/1.1'  # Keep-alive, as the connection pool expects
+    objects = {}  # category -> [(obj_id, title)]
+    statuses = []  # Status of every request served
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        query = parse_qs(urlsplit(self.path).query)
+        category = query['category'][0]
+        offset, limit = int(query['offset'][0]), int(query['limit'][0])
+        items = [{category: {'meta': {'title': title, 'category': category,
+                                      'uri': f'/gdc/md/{PID}/obj/{obj_id}'},
+                             'content': {}}}
+                 for obj_id, title in self.objects[category][offset:offset + limit]]
+        body = json.dumps({'objects': {'items': items}}).encode()
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.statuses.append(304)
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.statuses.append(200)
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class CatalogSyncTest(unittest.TestCase):
+
+    def setUp(self):
+        StubAPI.objects = {
+            'metric': [(str(n), f'Metric {n}') for n in range(1, 124)],
+            'attribute': [(str(n), f'Attribute {n}') for n in range(1000, 1030)],
+        }
+        StubAPI.statuses = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubAPI)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        self.store = CatalogStore(Path(workdir.name) / 'catalog.db')
+        self.store.put(PID, 'metrics', 'manual', 'Added by hand')
+        self.sync = CatalogSync(self.store, f'http://127.0.0.1:{self.server.server_port}',
+                                headers={}, workers=3, page_size=50)
+
+    def stored(self):
+        return {entry['id']: entry['name'] for entries in self.store.load_state(PID).values()
+                for entry in entries}
+
+    def test_full_then_revalidated_sync(self):
+        result = self.sync.sync(PID)
+        self.assertEqual(len(result['entries']), 153)
+        self.assertEqual(result['removed'], [])
+        self.assertEqual(result['not_modified'], 0)
+        self.assertEqual(len(self.stored()), 154)
+
+        StubAPI.statuses = []
+        result = self.sync.sync(PID)
+        self.assertEqual(result['entries'], [])
+        self.assertEqual(result['fetched'], 0)
+        self.assertEqual(result['not_modified'], 4)  # 3 metric pages and 1 attribute page
+        self.assertIn(304, StubAPI.statuses)
+
+    def test_shrink_renames_and_removes(self):
+        self.sync.sync(PID)
+        metrics = StubAPI.objects['metric']
+        metrics[0] = ('1', 'Renamed')
+        StubAPI.objects['metric'] = metrics[:-30]  # The third page disappears entirely
+        StubAPI.objects['attribute'] = StubAPI.objects['attribute'][:-1]
+
+        result = self.sync.sync(PID)
+        self.assertEqual(result['removed'], sorted([str(n) for n in range(94, 124)] + ['1029']))
+        self.assertIn(('metrics', '1', 'Renamed'), result['entries'])
+        stored = self.stored()
+        self.assertEqual(stored['1'], 'Renamed')
+        self.assertNotIn('123', stored)
+        self.assertNotIn('1029', stored)
+        self.assertEqual(stored['manual'], 'Added by hand')  # Never delivered by a sync, so kept
+
+        # The shrunken result is the new baseline: nothing changes on the next sync
+        result = self.sync.sync(PID)
+        self.assertEqual((result['entries'], result['removed'], result['fetched']), ([], [], 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,296 @@
+import tkinter as tk
+from tkinter import ttk
+
+
+class VirtualList(ttk.Frame):
+    """Scrollable button list that only materializes the rows currently on screen.
+
+    Rows are a small pool of ttk.Buttons that get recycled as the list scrolls,
+    so the number of widgets depends on the visible height, not on len(items).
+    """
+
+    def __init__(self, parent, on_activate, on_menu, width=220, height=300,
+                 row_style='Modern.TButton', hover_style='ModernHover.TButton', **kwargs):
+        super().__init__(parent, **kwargs)
+        self.items = []  # Sequence of objects with a .name attribute
+        self.first = 0  # Index of the item shown in the top row
+        self.on_activate = on_activate  # Called with the item on click/Return/space
+        self.on_menu = on_menu  # Called with (event, item) on right-click
+        self.row_style = row_style
+        self.hover_style = hover_style
+        self.row_height = None
+        self._rows = []
+
+        self.body = ttk.Frame(self, width=width, height=height, style=kwargs.get('style', 'TFrame'))
+        self.body.pack(side='left', fill='both', expand=True)
+        self.scrollbar = ttk.Scrollbar(self, orient='vertical', command=self.yview)
+        self.scrollbar.pack(side='right', fill='y')
+
+        self.body.bind('<Configure>', lambda e: self.refresh())
+        self._bind_wheel(self.body)
+
+    # Data -----------------------------------------------------------------
+
+    def set_items(self, items):
+        """Render a (live) sequence of items, keeping the scroll position if possible"""
+        self.items = items
+        self.refresh()
+
+    # Rendering ------------------------------------------------------------
+
+    def _make_row(self):
+        row = ttk.Button(self.body, style=self.row_style)
+        row.index = None
+        row.configure(command=lambda r=row: self._activate(r))
+        row.bind('<Return>', lambda e, r=row: self._activate(r))
+        row.bind('<space>', lambda e, r=row: self._activate(r))
+        row.bind('<Up>', lambda e, r=row: self._move_focus(r, -1))
+        row.bind('<Down>', lambda e, r=row: self._move_focus(r, 1))
+        row.bind('<Button-3>', lambda e, r=row: self._menu(e, r))  # Right-click on Windows/Linux
+        row.bind('<Control-1>', lambda e, r=row: self._menu(e, r))  # Control+click on Mac
+        row.bind('<Enter>', lambda e, r=row: r.configure(style=self.hover_style))
+        row.bind('<Leave>', lambda e, r=row: r.configure(style=self.row_style))
+        self._bind_wheel(row)
+        self._rows.append(row)
+        return row
+
+    def _visible_count(self):
+        if self.row_height is None:
+            probe = self._rows[0] if self._rows else self._make_row()
+            self.row_height = probe.winfo_reqheight() + 10  # Matches pady=5 of packed buttons
+        return max(1, self.body.winfo_height() // self.row_height)
+
+    def refresh(self):
+        """Bind the pooled rows to the items in the current viewport"""
+        visible = self._visible_count()
+        self.first = max(0, min(self.first, len(self.items) - visible))
+        while len(self._rows) < visible:
+            self._make_row()
+
+        for offset, row in enumerate(self._rows):
+            index = self.first + offset
+            if offset < visible and index < len(self.items):
+                row.index = index
+                row.configure(text=self.items[index].name)
+                row.place(x=5, y=offset * self.row_height + 5, relwidth=1, width=-10,
+                          height=self.row_height - 10)
+            else:
+                row.index = None
+                row.place_forget()
+
+        if self.items:
+            total = len(self.items)
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + visible) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    # Scrolling ------------------------------------------------------------
+
+    def yview(self, *args):
+        """Scrollbar command handler ('moveto' fraction / 'scroll' n units|pages)"""
+        visible = self._visible_count()
+        if args[0] == 'moveto':
+            self.first = int(float(args[1]) * len(self.items))
+        elif args[0] == 'scroll':
+            step = visible if args[2] == 'pages' else 1
+            self.first += int(args[1]) * step
+        self.refresh()
+
+    def _bind_wheel(self, widget):
+        widget.bind('<MouseWheel>', self._on_wheel)
+        widget.bind('<Button-4>', self._on_wheel)  # X11 scroll up
+        widget.bind('<Button-5>', self._on_wheel)  # X11 scroll down
+
+    def _on_wheel(self, event):
+        if event.num == 4:
+            delta = -1
+        elif event.num == 5:
+            delta = 1
+        elif abs(event.delta) >= 120:  # Windows reports multiples of 120
+            delta = -event.delta // 120
+        else:  # macOS reports small deltas
+            delta = -event.delta
+        self.first += delta
+        self.refresh()
+        return 'break'
+
+    # Row events -----------------------------------------------------------
+
+    def _item_for(self, row):
+        if row.index is None or row.index >= len(self.items):
+            return None
+        return self.items[row.index]
+
+    def _activate(self, row):
+        item = self._item_for(row)
+        if item is not None:
+            self.on_activate(item)
+
+    def _menu(self, event, row):
+        item = self._item_for(row)
+        if item is not None:
+            self.on_menu(event, item)
+
+    def _move_focus(self, row, step):
+        """Keyboard navigation that scrolls when focus leaves the viewport"""
+        if row.index is None:
+            return 'break'
+        target = row.index + step
+        if not 0 <= target < len(self.items):
+            return 'break'
+        visible = self._visible_count()
+        if target < self.first:
+            self.first = target
+        elif target >= self.first + visible:
+            self.first = target - visible + 1
+        self.refresh()
+        self._rows[target - self.first].focus_set()
+        return 'break'
+
+
+class ItemDialog(tk.Toplevel):
+    """Modal Name/ID dialog that is built once and hidden between uses.
+
+    open() refills and shows it, and close() only withdraws it, so adding and
+    editing items any number of times creates no new widgets or Tcl commands.
+    """
+
+    def __init__(self, parent, background, entry_style='Modern.TEntry',
+                 button_style='Modern.TButton', frame_style='Modern.TFrame'):
+        super().__init__(parent)
+        self.withdraw()
+        self.geometry("300x180")
+        self.configure(bg=background)
+        self.transient(parent)
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.on_submit = None
+
+        ttk.Label(self, text="Name:", background=background).pack(pady=(10, 0))
+        self.name_entry = ttk.Entry(self, width=30, style=entry_style)
+        self.name_entry.pack(pady=(0, 10))
+        ttk.Label(self, text="ID:", background=background).pack()
+        self.id_entry = ttk.Entry(self, width=30, style=entry_style)
+        self.id_entry.pack(pady=(0, 10))
+
+        button_frame = ttk.Frame(self, style=frame_style)
+        button_frame.pack(pady=10, fill='x', padx=10)
+        ttk.Button(button_frame, text="Cancel", style=button_style,
+                   command=self.close).pack(side='left', padx=(0, 5), expand=True, fill='x')
+        ttk.Button(button_frame, text="Save", style=button_style,
+                   command=self._submit).pack(side='right', padx=(5, 0), expand=True, fill='x')
+        self.bind('<Return>', lambda e: self._submit())
+        self.bind('<Escape>', lambda e: self.close())
+
+    def open(self, title, near, on_submit, name='', obj_id=''):
+        """Show the dialog next to the widget near; on_submit(name, obj_id) runs on Save"""
+        self.on_submit = on_submit
+        self.title(title)
+        for entry, value in ((self.name_entry, name), (self.id_entry, obj_id)):
+            entry.delete(0, 'end')
+            entry.insert(0, value)
+        self.geometry(f"+{near.winfo_rootx() + 50}+{near.winfo_rooty() + 50}")
+        self.deiconify()
+        self.grab_set()
+        self.name_entry.focus_set()
+
+    def close(self):
+        self.grab_release()
+        self.withdraw()
+        self.on_submit = None
+
+    def _submit(self):
+        name, obj_id = self.name_entry.get(), self.id_entry.get()
+        on_submit = self.on_submit
+        self.close()
+        if name and obj_id and on_submit is not None:
+            on_submit(name, obj_id)
+
+
+class PidPickerDialog(tk.Toplevel):
+    """Modal multi-select list of PIDs, built once and hidden between uses like ItemDialog"""
+
+    def __init__(self, parent, background, button_style='Modern.TButton', frame_style='Modern.TFrame'):
+        super().__init__(parent)
+        self.withdraw()
+        self.geometry("320x360")
+        self.configure(bg=background)
+        self.transient(parent)
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.on_submit = None
+
+        ttk.Label(self, text="PIDs:", background=background).pack(pady=(10, 0))
+        list_frame = ttk.Frame(self, style=frame_style)
+        list_frame.pack(fill='both', expand=True, padx=10, pady=(0, 5))
+        self.listbox = tk.Listbox(list_frame, selectmode='extended', exportselection=False,
+                                  borderwidth=0, highlightthickness=0)
+        scrollbar = ttk.Scrollbar(list_frame, orient='vertical', command=self.listbox.yview)
+        self.listbox.configure(yscrollcommand=scrollbar.set)
+        self.listbox.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='right', fill='y')
+
+        button_frame = ttk.Frame(self, style=frame_style)
+        button_frame.pack(pady=10, fill='x', padx=10)
+        ttk.Button(button_frame, text="All", style=button_style,
+                   command=lambda: self.listbox.selection_set(0, 'end')).pack(
+                       side='left', padx=(0, 5), expand=True, fill='x')
+        ttk.Button(button_frame, text="Cancel", style=button_style,
+                   command=self.close).pack(side='left', padx=5, expand=True, fill='x')
+        self.submit_button = ttk.Button(button_frame, style=button_style, command=self._submit)
+        self.submit_button.pack(side='right', padx=(5, 0), expand=True, fill='x')
+        self.bind('<Return>', lambda e: self._submit())
+        self.bind('<Escape>', lambda e: self.close())
+
+    def open(self, title, near, pids, on_submit, submit_text="OK"):
+        """Show the dialog next to near listing pids; on_submit(selected pids) runs on submit"""
+        self.on_submit = on_submit
+        self.title(title)
+        self.submit_button.configure(text=submit_text)
+        self.listbox.delete(0, 'end')
+        self.listbox.insert('end', *pids)
+        self.geometry(f"+{near.winfo_rootx() + 50}+{near.winfo_rooty() + 50}")
+        self.deiconify()
+        self.grab_set()
+        self.listbox.focus_set()
+
+    def close(self):
+        self.grab_release()
+        self.withdraw()
+        self.on_submit = None
+
+    def _submit(self):
+        pids = [self.listbox.get(index) for index in self.listbox.curselection()]
+        on_submit = self.on_submit
+        self.close()
+        if pids and on_submit is not None:
+            on_submit(pids)
+
+
+class ProfilerHUD(ttk.Label):
+    """Small overlay in the window corner listing the slowest profiled handlers.
+
+    Handlers that have run longer than the profiler's frame budget are marked
+    with '!'. The text is refreshed every interval_ms from profiler.snapshot(),
+    followed by the census (e.g. widget counts) when one is given.
+    """
+
+    def __init__(self, parent, profiler, census=None, interval_ms=500, rows=8, style='HUD.TLabel',
+                 **kwargs):
+        super().__init__(parent, style=style, justify='left', **kwargs)
+        self.profiler = profiler
+        self.census = census  # Optional callable returning {label: count} shown at the bottom
+        self.interval_ms = interval_ms
+        self.rows = rows
+        self.place(relx=1.0, rely=1.0, x=-4, y=-4, anchor='se')
+        self.after(interval_ms, self.refresh)
+
+    def refresh(self):
+        lines = [f"{'handler':<24}{'calls':>7}{'p50':>8}{'p99':>8}"]
+        for name, stats in list(self.profiler.snapshot().items())[:self.rows]:
+            flag = '!' if stats['over_budget'] else ' '
+            lines.append(f"{flag}{name[:23]:<23}{stats['calls']:>7}"
+                         f"{stats['p50_ms']:>8.1f}{stats['p99_ms']:>8.1f}")
+        if self.census is not None:
+            lines.append('  '.join(f"{label} {count}" for label, count in self.census().items()))
+        self.configure(text='\n'.join(lines))
+        self.lift()
+        self.after(self.interval_ms, self.refresh)